@@ -5,16 +5,45 @@ Provides shared functionality for all A2UI generation agents.
 """
 
 import os
-import json
-import re
+from functools import lru_cache
 from typing import Annotated, TypedDict, List
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
+from langchain_core.callbacks.manager import adispatch_custom_event
 from langchain_core.messages import HumanMessage, SystemMessage, BaseMessage
+from langchain_core.runnables import RunnableConfig
 
-from app.schemas.a2ui_models import A2UIGenerationOutput
+# Provider SDKs are imported eagerly so the first request doesn't pay for
+# their transitive imports; either one may be absent if unused.
+try:
+    from langchain_anthropic import ChatAnthropic
+except ImportError:
+    ChatAnthropic = None
+
+try:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+except ImportError:
+    ChatGoogleGenerativeAI = None
+
+from app.schemas.a2ui_models import A2UIGenerationOutput, A2UI_MESSAGE_ADAPTER
 from app.utils.a2ui_builder import A2UIBuilder
+from app.utils.json_codec import dumps
 from app.utils.prompt_loader import load_prompt_template
+from app.utils.semantic_cache import SemanticCache
+
+
+# Shared across agents; entries are namespaced per provider + agent + prompt
+# template. Off by default: the built-in bag-of-words embedding is lexical,
+# so near-identical prompts with different meaning can match.
+_semantic_cache = SemanticCache(
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+    ttl_seconds=float(os.getenv("SEMANTIC_CACHE_TTL", "3600")),
+    max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "0")),
+)
+
+
+# Name of the custom event carrying generation milestones (see agui_endpoint)
+PROGRESS_EVENT = "a2ui_progress"
 
 
 class AgentState(TypedDict):
@@ -25,98 +54,88 @@ class AgentState(TypedDict):
     error: str | None
 
 
+def _resolve_provider(provider: str | None) -> str:
+    """Resolve the provider parameter, falling back to the LLM_PROVIDER env var."""
+    if provider is None:
+        return os.getenv("LLM_PROVIDER", "anthropic").lower()
+    return provider.lower()
+
+
 def _create_llm(model_name: str, temperature: float, provider: str | None = None):
     """Create the appropriate LLM based on provider parameter or LLM_PROVIDER env var.
 
     Returns (llm, uses_structured_output) tuple.
     Gemini can't handle Any types in tool schemas, so we use plain JSON output.
     """
-    if provider is None:
-        provider = os.getenv("LLM_PROVIDER", "anthropic").lower()
-    else:
-        provider = provider.lower()
+    return _create_llm_cached(model_name, temperature, _resolve_provider(provider))
+
 
+@lru_cache(maxsize=None)
+def _create_llm_cached(model_name: str, temperature: float, provider: str):
+    """Build one LLM client per (model, temperature, provider) so HTTP connection pools are reused."""
     if provider == "google":
-        from langchain_google_genai import ChatGoogleGenerativeAI
+        if ChatGoogleGenerativeAI is None:
+            raise ImportError("LLM_PROVIDER=google requires: pip install langchain-google-genai")
         model = os.getenv("GOOGLE_MODEL", "gemini-2.5-flash")
         print(f"[LLM] Using Google: {model}")
         llm = ChatGoogleGenerativeAI(
             model=model,
             temperature=temperature,
-            max_output_tokens=8192,
+            max_output_tokens=int(os.getenv("GOOGLE_MAX_OUTPUT_TOKENS", "8192")),
+            # Native JSON mode (langchain-google-genai>=2.1.6): no prose or code fences
+            response_mime_type="application/json",
         )
         return llm, False
     else:
-        from langchain_anthropic import ChatAnthropic
+        if ChatAnthropic is None:
+            raise ImportError("LLM_PROVIDER=anthropic requires: pip install langchain-anthropic")
         model = os.getenv("ANTHROPIC_MODEL", model_name)
         print(f"[LLM] Using Anthropic: {model}")
         llm = ChatAnthropic(
             model=model,
             temperature=temperature,
-            max_tokens=4096,
+            max_tokens=int(os.getenv("ANTHROPIC_MAX_TOKENS", "4096")),
+            default_headers={"anthropic-beta": "prompt-caching-2024-07-31"},
         ).with_structured_output(A2UIGenerationOutput)
         return llm, True
 
 
-def _normalize_data_model_contents(contents):
-    """Normalize dataModelUpdate contents into the expected list format.
+def _strip_code_fences(text: str) -> str:
+    """Strip markdown code fences (```json ... ```) if present.
 
-    Gemini may return contents as a dict instead of a list of DataModelContent objects.
-    This converts various shapes into the canonical: [{"key": "...", "valueArray|valueString|...": ...}]
+    Plain string checks instead of regex; the common no-fence case costs
+    two ``startswith``/``endswith`` calls.
     """
-    if isinstance(contents, list):
-        # Already a list - check if items need wrapping
-        normalized = []
-        for item in contents:
-            if isinstance(item, dict) and "key" in item:
-                normalized.append(item)
-            else:
-                # Raw data item in a list, wrap it
-                normalized.append({"key": "data", "valueArray": contents})
-                return normalized
-        return normalized
-
-    if isinstance(contents, dict):
-        # Dict with key/value pairs - convert each to a DataModelContent
-        if "key" in contents:
-            # Single DataModelContent as a dict
-            return [contents]
-        if "valueArray" in contents:
-            # Missing "key" wrapper
-            return [{"key": "data", "valueArray": contents["valueArray"]}]
-        # Dict of key-value pairs like {"totalSales": "$1.2M", ...}
-        result = []
-        for key, value in contents.items():
-            if isinstance(value, str):
-                result.append({"key": key, "valueString": value})
-            elif isinstance(value, bool):
-                result.append({"key": key, "valueBoolean": value})
-            elif isinstance(value, (int, float)):
-                result.append({"key": key, "valueNumber": float(value)})
-            elif isinstance(value, list):
-                result.append({"key": key, "valueArray": value})
-        return result
-
-    return [{"key": "data", "valueString": str(contents)}]
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned[3:]
+        if cleaned.startswith("json"):
+            cleaned = cleaned[4:]
+        cleaned = cleaned.lstrip()
+    if cleaned.endswith("```"):
+        cleaned = cleaned[:-3].rstrip()
+    return cleaned
 
 
 def _parse_json_response(text: str) -> A2UIGenerationOutput:
     """Parse a raw LLM text response into A2UIGenerationOutput.
 
-    Normalizes Gemini's loosely-shaped JSON to match the Pydantic schema.
+    Decodes and validates in one pass with Pydantic's Rust JSON parser;
+    Gemini's loosely-shaped dataModelUpdate contents are normalized by the
+    schema itself (see DataModelUpdate).
     """
-    # Strip markdown code fences if present
-    cleaned = re.sub(r"^```(?:json)?\s*\n?", "", text.strip())
-    cleaned = re.sub(r"\n?```\s*$", "", cleaned)
-    data = json.loads(cleaned)
+    return A2UIGenerationOutput.model_validate_json(_strip_code_fences(text))
 
-    # Normalize each message's dataModelUpdate contents
-    for msg in data.get("messages", []):
-        dmu = msg.get("dataModelUpdate")
-        if dmu and "contents" in dmu:
-            dmu["contents"] = _normalize_data_model_contents(dmu["contents"])
 
-    return A2UIGenerationOutput(**data)
+def message_to_jsonl(raw: dict) -> str:
+    """
+    Convert one raw A2UI message dict, as parsed from a partial LLM stream,
+    into the JSONL line the agent will produce for it once generation ends.
+
+    Raises:
+        pydantic.ValidationError: If the message does not match the A2UI schema
+    """
+    return A2UIBuilder.serialize_message(A2UI_MESSAGE_ADAPTER.validate_python(raw))
 
 
 JSON_OUTPUT_INSTRUCTION = """
@@ -157,6 +176,20 @@ Supported component types: Text, Button, Card, Row, Column, Table, Chart, Form,
 """
 
 
+HUMAN_PROMPT_TEMPLATE = """
+User Request: {user_msg}
+
+Please generate appropriate A2UI components for this request.
+
+Remember to:
+1. Use the surfaceUpdate message to define all components
+2. Use dataModelUpdate messages to provide realistic sample data
+3. End with a beginRendering message
+
+Return a complete A2UI response following the protocol.
+"""
+
+
 def create_a2ui_agent(
     agent_name: str,
     prompt_template_name: str,
@@ -191,9 +224,26 @@ def create_a2ui_agent(
     if not uses_structured_output:
         system_prompt += JSON_OUTPUT_INSTRUCTION
 
-    def analyze_request(state: AgentState) -> AgentState:
+    cache_namespace = f"{_resolve_provider(provider)}:{agent_name}:{prompt_template_name}"
+
+    # The system prompt is identical for every request, so build it once and
+    # let Anthropic cache it as a prompt prefix. Gemini 2.5 models cache
+    # repeated prefixes implicitly, so a plain message is enough there.
+    if _resolve_provider(provider) == "google":
+        system_message = SystemMessage(content=system_prompt)
+    else:
+        system_message = SystemMessage(content=[{
+            "type": "text",
+            "text": system_prompt,
+            "cache_control": {"type": "ephemeral"},
+        }])
+
+    async def analyze_request(state: AgentState, config: RunnableConfig) -> AgentState:
         """
         Analyze user request and generate A2UI response.
+
+        Uses the async LLM API so provider tokens surface through
+        ``astream_events`` while the response is being generated.
         """
         try:
             # Get the last user message
@@ -203,25 +253,25 @@ def create_a2ui_agent(
             else:
                 user_msg = state.get("user_request", "Generate a default interface")
 
+            # Serve near-duplicate requests from the semantic cache
+            cached = _semantic_cache.lookup(user_msg, namespace=cache_namespace)
+            if cached is not None:
+                await adispatch_custom_event(PROGRESS_EVENT, {"milestone": "cache_hit"}, config=config)
+                state["a2ui_output"] = cached
+                state["error"] = None
+                return state
+
             # Construct prompt
             prompt = [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=f"""
-User Request: {user_msg}
-
-Please generate appropriate A2UI components for this request.
-
-Remember to:
-1. Use the surfaceUpdate message to define all components
-2. Use dataModelUpdate messages to provide realistic sample data
-3. End with a beginRendering message
-
-Return a complete A2UI response following the protocol.
-""")
+                system_message,
+                HumanMessage(content=HUMAN_PROMPT_TEMPLATE.format(user_msg=user_msg))
             ]
 
-            # Invoke LLM
-            raw_result = llm.invoke(prompt)
+            await adispatch_custom_event(PROGRESS_EVENT, {"milestone": "prompt_built"}, config=config)
+
+            # Invoke LLM (config carries the streaming callbacks)
+            raw_result = await llm.ainvoke(prompt, config=config)
+            await adispatch_custom_event(PROGRESS_EVENT, {"milestone": "llm_responded"}, config=config)
 
             # Parse response based on provider
             if uses_structured_output:
@@ -230,30 +280,41 @@ Return a complete A2UI response following the protocol.
                 text = raw_result.content if hasattr(raw_result, 'content') else str(raw_result)
                 result = _parse_json_response(text)
 
-            # Convert to JSONL format
-            a2ui_jsonl = A2UIBuilder.from_structured_output(result)
+            # Convert to JSONL format, keeping the split lines for streaming
+            lines = A2UIBuilder.structured_output_lines(result)
+            a2ui_jsonl = "\n".join(lines)
 
-            state["a2ui_output"] = {
+            # One flat dict, shared as-is with the semantic cache
+            a2ui_output = {
                 "jsonl": a2ui_jsonl,
-                "reasoning": result.reasoning if hasattr(result, 'reasoning') else None
+                "lines": lines,
+                "reasoning": getattr(result, "reasoning", None),
             }
+            state["a2ui_output"] = a2ui_output
             state["error"] = None
+            await adispatch_custom_event(PROGRESS_EVENT, {"milestone": "jsonl_built"}, config=config)
+            _semantic_cache.put(user_msg, a2ui_output, namespace=cache_namespace)
 
         except Exception as e:
             print(f"Error in {agent_name} analyze_request: {e}")
             state["error"] = str(e)
             # Provide fallback minimal response
+            error_jsonl = _create_error_ui(str(e))
             state["a2ui_output"] = {
-                "jsonl": _create_error_ui(str(e)),
+                "jsonl": error_jsonl,
+                "lines": error_jsonl.split("\n"),
                 "reasoning": None
             }
 
         return state
 
-    def stream_response(state: AgentState) -> AgentState:
+    async def stream_response(state: AgentState) -> AgentState:
         """
         Prepare response for streaming.
         CopilotKit handles actual streaming.
+
+        Async so LangGraph runs it on the event loop rather than in a
+        worker thread when the graph is invoked asynchronously.
         """
         # This node exists for potential future processing
         # CopilotKit's AG-UI protocol handles the actual streaming
@@ -274,6 +335,17 @@ Return a complete A2UI response following the protocol.
     return workflow.compile()
 
 
+# Error UI rendered once at import; only the message varies per failure
+_ERROR_MESSAGE_SENTINEL = "__ERR_MSG__"
+_ERROR_UI_TEMPLATE = (
+    A2UIBuilder()
+    .add_text("error_title", "Error", usage_hint="title")
+    .add_card("error_card", "Generation Failed", children=["error_msg"])
+    .add_text("error_msg", f"Failed to generate UI: {_ERROR_MESSAGE_SENTINEL}", usage_hint="body")
+    .build_jsonl()
+)
+
+
 def _create_error_ui(error_message: str) -> str:
     """
     Create a simple error UI when agent fails.
@@ -284,8 +356,5 @@ def _create_error_ui(error_message: str) -> str:
     Returns:
         JSONL string with error message
     """
-    builder = A2UIBuilder()
-    builder.add_text("error_title", "Error", usage_hint="title")
-    builder.add_card("error_card", "Generation Failed", children=["error_msg"])
-    builder.add_text("error_msg", f"Failed to generate UI: {error_message}", usage_hint="body")
-    return builder.build_jsonl()
+    # JSON-escape the message and splice it into the pre-rendered string literal
+    return _ERROR_UI_TEMPLATE.replace(_ERROR_MESSAGE_SENTINEL, dumps(error_message)[1:-1])
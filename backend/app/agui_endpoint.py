@@ -8,107 +8,261 @@ Uses Server-Sent Events (SSE) for real-time streaming.
 from fastapi import Request
 from fastapi.responses import StreamingResponse
 from langchain_core.messages import HumanMessage
-import json
 import asyncio
+import logging
 
+from app.agents.base_agent import PROGRESS_EVENT, message_to_jsonl
+from app.utils.inflight import agent_run_key, agent_runs
+from app.utils.json_codec import dumps_bytes, loads
+from app.utils.json_stream import MessageStreamParser
 
-async def agui_stream_endpoint(request: Request, dashboard_graph, data_viz_graph, form_graph, body: dict | None = None):
+logger = logging.getLogger("chatlang.api.agui")
+
+# Number of A2UI lines coalesced into one streamed chunk
+SSE_FRAMES_PER_CHUNK = 8
+
+# Status messages for the milestones reported by the agent
+MILESTONE_MESSAGES = {
+    "cache_hit": "Reusing a UI generated for a similar request...",
+    "prompt_built": "Waiting for the LLM to respond...",
+    "llm_responded": "LLM responded, validating components...",
+    "jsonl_built": "Components ready...",
+}
+
+
+def _sse(payload: dict) -> bytes:
+    """Encode one SSE data frame as bytes, so Starlette writes it without re-encoding"""
+    return b"data: " + dumps_bytes(payload) + b"\n\n"
+
+
+# Static status frames, encoded once
+_STATUS_RECEIVED = _sse({'type': 'status', 'message': 'Message received...'})
+_STATUS_CALLING_LLM = _sse({'type': 'status', 'message': 'Calling LLM AI to generate UI...'})
+_STATUS_COMPLETE = _sse({'type': 'status', 'message': 'UI generation complete! Streaming components...'})
+
+
+async def _run_agent(agent_graph, message: str, events: asyncio.Queue) -> dict:
+    """Run an agent graph, relaying its stream events into a queue.
+
+    Returns:
+        Final graph state
+    """
+    result = {}
+    async for event in agent_graph.astream_events({
+        "messages": [HumanMessage(content=message)],
+        "user_request": message,
+        "a2ui_output": {},
+        "error": None
+    }, version="v2"):
+        if event["event"] == "on_chain_end" and not event.get("parent_ids"):
+            # Root graph finished; its output is the final state
+            result = event["data"].get("output") or {}
+        else:
+            events.put_nowait(event)
+    return result
+
+
+def _chunk_text(chunk) -> str:
+    """Extract the text delta from a streamed chat model chunk.
+
+    Plain text arrives in ``content``; structured output (tool calling)
+    arrives as partial JSON in content blocks or ``tool_call_chunks``.
+    """
+    content = chunk.content
+    if isinstance(content, str):
+        text = content
+    else:
+        text = "".join(
+            block.get("text") or block.get("partial_json") or ""
+            for block in content
+            if isinstance(block, dict)
+        )
+    if not text:
+        text = "".join(tc.get("args") or "" for tc in getattr(chunk, "tool_call_chunks", None) or [])
+    return text
+
+
+async def stream_agent_run(agent_graph, run_key: tuple, message: str):
+    """
+    Run an agent graph, or join an identical run already in flight, and
+    yield its progress as ``(kind, payload)`` tuples:
+
+    - ``("status", str)``: a generation milestone reported by the agent
+    - ``("delta", str)``: raw text/JSON tokens from the LLM
+    - ``("a2ui", str)``: a JSONL line, as soon as the LLM closes the message
+    - ``("result", dict)``: the final graph state, always last
+
+    Only the run's starter receives its events; joiners get the final state.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+    run = agent_runs.get_or_start(run_key, lambda: _run_agent(agent_graph, message, events))
+    parser = MessageStreamParser()
+
+    def translate(event) -> list:
+        kind = event["event"]
+        items = []
+        if kind == "on_chat_model_stream":
+            delta = _chunk_text(event["data"]["chunk"])
+            if not delta:
+                return items
+            items.append(("delta", delta))
+            for raw_message in parser.feed(delta):
+                try:
+                    items.append(("a2ui", message_to_jsonl(raw_message)))
+                except Exception:
+                    continue  # Left for the final output to report
+        elif kind == "on_custom_event" and event["name"] == PROGRESS_EVENT:
+            status_msg = MILESTONE_MESSAGES.get(event["data"].get("milestone"))
+            if status_msg:
+                items.append(("status", status_msg))
+        return items
+
+    while True:
+        next_event = asyncio.ensure_future(events.get())
+        try:
+            await asyncio.wait({next_event, run}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            got_event = next_event.done()
+            if not got_event:
+                next_event.cancel()
+        if not got_event:
+            break
+        for item in translate(next_event.result()):
+            yield item
+    while not events.empty():
+        for item in translate(events.get_nowait()):
+            yield item
+
+    yield "result", await asyncio.shield(run)
+
+
+def result_lines(a2ui_data: dict, streamed_lines: list, error: str | None = None) -> tuple:
+    """
+    Return the agent output's JSONL lines and how many of them were already
+    streamed while the LLM was generating.
+
+    The count is None when lines were streamed but the final output does not
+    continue them, e.g. the LLM's JSON was cut off and the agent fell back to
+    its error UI. Callers must not send any further lines in that case.
+    """
+    lines = a2ui_data.get("lines")
+    if lines is None:
+        lines = [line for line in (a2ui_data.get("jsonl") or "").strip().split("\n") if line.strip()]
+    if not streamed_lines:
+        return lines, 0
+    if error is None and lines[:len(streamed_lines)] == streamed_lines:
+        return lines, len(streamed_lines)
+    return lines, None
+
+
+async def parsed_body(request: Request) -> dict:
+    """
+    Parse the JSON request body once and cache it on ``request.state``.
+
+    Later callers for the same request get the cached dict instead of
+    re-reading and re-decoding the body.
+    """
+    body = getattr(request.state, "parsed_body", None)
+    if body is None:
+        body = request.state.parsed_body = loads(await request.body())
+    return body
+
+
+async def agui_stream_endpoint(request: Request, provider: str, body: dict | None = None):
     """
     AG-UI protocol endpoint with SSE streaming.
 
     Streams A2UI JSONL responses line by line for real-time UI updates.
+    Agent graphs are compiled once at startup and read from
+    ``request.app.state.graphs[provider][agent_name]``.
     """
 
-    # Use pre-parsed body if provided, otherwise parse from request
+    # Use pre-parsed body if provided, otherwise parse from request (cached)
     if body is None:
-        body = await request.json()
+        body = await parsed_body(request)
     message = body.get("message", "")
     agent_name = body.get("agent", "dashboard_agent")
 
-    print(f"\n[AG-UI] Received request for agent: {agent_name}")
-    print(f"[AG-UI] Message: {message}")
+    logger.info("Received request for agent: %s", agent_name)
+    logger.info("Message: %s", message)
 
     async def event_stream():
         try:
 
             # Select agent based on request
-            agent_graph = {
-                "dashboard_agent": dashboard_graph,
-                "data_viz_agent": data_viz_graph,
-                "form_agent": form_graph,
-            }.get(agent_name, dashboard_graph)
+            graphs = request.app.state.graphs[provider]
+            graph_name = agent_name if agent_name in graphs else "dashboard_agent"
+            agent_graph = graphs[graph_name]
 
             # Send initial status
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Message received...'})}\n\n"
-            await asyncio.sleep(0.05)
+            yield _STATUS_RECEIVED
 
             # Status: Calling LLM
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Calling LLM AI to generate UI...'})}\n\n"
-            await asyncio.sleep(0.05)
-
-            # Periodic status messages during agent processing
-            status_messages = [
-                "Analyzing your request...",
-                "Planning dashboard layout...",
-                "Selecting visualization components...",
-                "Generating data structures...",
-                "Creating interactive elements...",
-                "Finalizing UI design...",
-            ]
-
-            # Run agent invocation with periodic status updates
-            agent_task = asyncio.create_task(agent_graph.ainvoke({
-                "messages": [HumanMessage(content=message)],
-                "user_request": message,
-                "a2ui_output": {},
-                "error": None
-            }))
-
-            # Send periodic updates while waiting
-            status_index = 0
-            while not agent_task.done():
-                await asyncio.sleep(3)  # Wait 3 seconds between updates
-                if not agent_task.done():
-                    status_msg = status_messages[status_index % len(status_messages)]
-                    yield f"data: {json.dumps({'type': 'status', 'message': status_msg})}\n\n"
-                    status_index += 1
-
-            # Get the result
-            result = await agent_task
+            yield _STATUS_CALLING_LLM
 
-            # Status: Processing complete
-            yield f"data: {json.dumps({'type': 'status', 'message': 'UI generation complete! Streaming components...'})}\n\n"
-            await asyncio.sleep(0.05)
+            # Forward provider tokens as deltas and emit each A2UI message as
+            # soon as the LLM closes it
+            streamed_lines = []
+            result = {}
+            async for kind, payload in stream_agent_run(
+                agent_graph, agent_run_key(provider, graph_name, message), message
+            ):
+                if kind == "a2ui":
+                    streamed_lines.append(payload)
+                    yield _sse({'type': 'a2ui', 'data': payload})
+                elif kind == "delta":
+                    yield _sse({'type': 'delta', 'data': payload})
+                elif kind == "status":
+                    yield _sse({'type': 'status', 'message': payload})
+                else:
+                    result = payload
 
             # Extract A2UI JSONL
-            a2ui_data = result.get("a2ui_output", {})
-            a2ui_jsonl = a2ui_data.get("jsonl", "")
-            reasoning = a2ui_data.get("reasoning", None)
+            a2ui_data = result.get("a2ui_output") or {}
+            a2ui_jsonl = a2ui_data.get("jsonl")
+            reasoning = a2ui_data.get("reasoning")
+            lines, already_streamed = result_lines(a2ui_data, streamed_lines, result.get("error"))
+
+            if already_streamed is None:
+                # Frames already reached the client; don't replay the error
+                # surface over the partial one
+                error_msg = result.get("error") or "Agent output diverged from the streamed messages"
+                yield _sse({'type': 'error', 'message': error_msg})
+                logger.error("Error after partial stream: %s", error_msg)
+                return
+
+            # Status: Processing complete
+            yield _STATUS_COMPLETE
 
             if a2ui_jsonl:
-                print(f"[AG-UI] Streaming A2UI response ({len(a2ui_jsonl)} chars)")
+                logger.info("Streaming A2UI response (%d chars)", len(a2ui_jsonl))
+
+                # Lines are split once by the agent; their SSE frames are encoded
+                # once and kept on the output so semantic cache hits reuse them
+                frames = a2ui_data.get("sse_frames")
+                if frames is None:
+                    frames = [_sse({'type': 'a2ui', 'data': line}) for line in lines]
+                    a2ui_data["sse_frames"] = frames
+
+                # Skip lines already streamed while the LLM was generating
+                frames = frames[already_streamed:]
 
-                # Stream each JSONL line
-                lines = a2ui_jsonl.strip().split("\n")
-                for line in lines:
-                    if line.strip():
-                        # Send as AG-UI message
-                        yield f"data: {json.dumps({'type': 'a2ui', 'data': line})}\n\n"
-                        await asyncio.sleep(0.05)  # Small delay for smooth streaming
+                # Stream JSONL lines as AG-UI messages, several SSE frames per write
+                for i in range(0, len(frames), SSE_FRAMES_PER_CHUNK):
+                    yield b"".join(frames[i:i + SSE_FRAMES_PER_CHUNK])
+                    await asyncio.sleep(0)  # Yield control between chunks
 
                 # Send completion message
-                yield f"data: {json.dumps({'type': 'complete', 'reasoning': reasoning})}\n\n"
-                print("[AG-UI] Stream completed successfully")
+                yield _sse({'type': 'complete', 'reasoning': reasoning})
+                logger.info("Stream completed successfully")
             else:
                 error_msg = result.get("error", "Unknown error")
-                yield f"data: {json.dumps({'type': 'error', 'message': error_msg})}\n\n"
-                print(f"[AG-UI] Error: {error_msg}")
+                yield _sse({'type': 'error', 'message': error_msg})
+                logger.error("Error: %s", error_msg)
 
         except Exception as e:
-            print(f"[AG-UI] Stream error: {e}")
-            import traceback
-            traceback.print_exc()
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+            logger.exception("Stream error: %s", e)
+            yield _sse({'type': 'error', 'message': str(e)})
 
     return StreamingResponse(
         event_stream(),
@@ -4,10 +4,21 @@ ChatLangA2UI FastAPI Application
 Main entry point for the backend server with CopilotKit integration.
 """
 
+import asyncio
+import atexit
+import importlib.util
+import logging
 import os
+import queue
+import re
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 import uvicorn
 
 # Load environment variables
@@ -19,237 +30,377 @@ from app.agents import (
     build_data_viz_agent,
     build_form_agent,
 )
+from app.agui_endpoint import agui_stream_endpoint, result_lines, stream_agent_run
+from app.utils.inflight import agent_run_key
+from app.utils.json_codec import dumps_bytes
+
+# Request-path logging goes through a queue so handler I/O stays off the event loop
+logger = logging.getLogger("chatlang.api")
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+logger.propagate = False
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(levelname)s:     [%(name)s] %(message)s"))
+_log_listener = QueueListener(_log_queue, _log_handler)
+logger.addHandler(QueueHandler(_log_queue))
+_log_listener.start()
+# Runs for the life of the process rather than one lifespan, so repeated
+# lifespans (reloads, test clients) neither stop it twice nor drop records
+atexit.register(_log_listener.stop)
+
+# A2UI JSONL payloads are streamed as newline-delimited JSON
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Environment-derived settings, resolved once at import
+DEFAULT_PROVIDER = os.getenv("LLM_PROVIDER", "anthropic").lower()
+DEFAULT_MODEL = (
+    os.getenv("GOOGLE_MODEL", "gemini-2.5-flash") if DEFAULT_PROVIDER == "google"
+    else os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-5-20250929")
+)
+CORS_ORIGINS = tuple(
+    origin.strip()
+    for origin in os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:5174").split(",")
+)
+
+# Sample A2UI JSONL for testing the renderer (also the /api/generate fallback)
+TEST_DASHBOARD_JSONL: bytes = """{"surfaceUpdate": {"surfaceId": "main", "components": [{"id": "title", "component": {"Text": {"text": {"literalString": "Sales Dashboard"}, "usage_hint": "title"}}}, {"id": "subtitle", "component": {"Text": {"text": {"literalString": "Q4 2024 Performance Overview"}, "usage_hint": "subtitle"}}}, {"id": "row1", "component": {"Row": {"children": ["card1", "card2", "card3"]}}}, {"id": "card1", "component": {"Card": {"title": {"literalString": "Total Revenue"}, "children": ["revenue_text"]}}}, {"id": "revenue_text", "component": {"Text": {"text": {"literalString": "$1,245,680"}, "usage_hint": "body"}}}, {"id": "card2", "component": {"Card": {"title": {"literalString": "New Customers"}, "children": ["customers_text"]}}}, {"id": "customers_text", "component": {"Text": {"text": {"literalString": "3,456"}, "usage_hint": "body"}}}, {"id": "card3", "component": {"Card": {"title": {"literalString": "Conversion Rate"}, "children": ["conversion_text"]}}}, {"id": "conversion_text", "component": {"Text": {"text": {"literalString": "24.5%"}, "usage_hint": "body"}}}, {"id": "chart_card", "component": {"Card": {"title": {"literalString": "Monthly Revenue Trend"}, "children": ["revenue_chart"]}}}, {"id": "revenue_chart", "component": {"Chart": {"config": {"type": "line", "xKey": "month", "yKey": "revenue", "dataPath": "/revenueData"}}}}, {"id": "table_card", "component": {"Card": {"title": {"literalString": "Top Products"}, "children": ["products_table"]}}}, {"id": "products_table", "component": {"Table": {"columns": [{"key": "product", "label": "Product", "type": "string"}, {"key": "sales", "label": "Sales", "type": "number"}, {"key": "revenue", "label": "Revenue", "type": "number"}], "dataPath": "/productsData"}}}]}}
+{"dataModelUpdate": {"surfaceId": "main", "path": "/revenueData", "contents": [{"key": "data", "valueArray": [{"month": "January", "revenue": 98000}, {"month": "February", "revenue": 105000}, {"month": "March", "revenue": 112000}, {"month": "April", "revenue": 108000}, {"month": "May", "revenue": 118000}, {"month": "June", "revenue": 125000}]}]}}
+{"dataModelUpdate": {"surfaceId": "main", "path": "/productsData", "contents": [{"key": "data", "valueArray": [{"product": "Widget Pro", "sales": 1250, "revenue": 125000}, {"product": "Gadget Plus", "sales": 980, "revenue": 98000}, {"product": "Tool Master", "sales": 875, "revenue": 87500}, {"product": "Device Elite", "sales": 650, "revenue": 65000}]}]}}
+{"beginRendering": {"surfaceId": "main"}}""".encode("utf-8")
+# Pre-framed NDJSON body: one message per line, newline terminated
+TEST_DASHBOARD_NDJSON: bytes = TEST_DASHBOARD_JSONL + b"\n"
+
+# Matches the first "llm_provider": "<name>" pair in a raw request body
+_PROVIDER_FIELD_RE = re.compile(rb'"llm_provider"\s*:\s*"([^"\\]*)"')
+
+# Agent graphs keyed by provider, then agent name; the single build cache
+_agents_cache: dict[str, dict] = {}
+# (dashboard, data_viz, form) view of _agents_cache, filled by _build_agents
+_agent_tuples: dict[str, tuple] = {}
+# Serializes first-use builds so concurrent requests never compile a provider twice
+_build_locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Compile the default provider's agent graphs before serving requests"""
+    # Each uvicorn worker warms its own graphs before accepting traffic
+    await get_agents(DEFAULT_PROVIDER)
+    setup_copilotkit(app)
+    yield
+
 
 # Create FastAPI app
 app = FastAPI(
     title="ChatLangA2UI API",
     description="AI agents that generate A2UI interfaces using LangChain and Claude",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
+# Compiled graphs shared with request handlers (see agui_stream_endpoint)
+app.state.graphs = _agents_cache
+
 # CORS configuration for local development
-cors_origins = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:5174").split(",")]
-print(f"[CORS] Allowed origins: {cors_origins}")
+logger.debug("CORS allowed origins: %s", CORS_ORIGINS)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=cors_origins,
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-# Agent graphs cache keyed by provider (lazy initialization)
-_agents_cache: dict[str, dict] = {}
+def resolve_provider(provider: str | None = None) -> str:
+    """Resolve an optional provider override against the LLM_PROVIDER env var"""
+    return provider.lower() if provider else DEFAULT_PROVIDER
+
+def peek_provider(raw_body: bytes) -> str | None:
+    """
+    Read llm_provider from a raw JSON body without decoding the rest of it.
+
+    This is a byte scan, not a parse: it returns the first "llm_provider"
+    string value anywhere in the body, including inside nested objects,
+    and a value containing JSON escapes does not match, so the caller
+    falls back to the default provider. Clients are expected to send
+    llm_provider as a plain top-level field (e.g. "anthropic").
+    """
+    match = _PROVIDER_FIELD_RE.search(raw_body)
+    return match.group(1).decode("utf-8") if match else None
+
+def _build_agents(provider: str) -> tuple:
+    """Compile all agent graphs for one provider and register them in both caches"""
+    logger.info("Building LangGraph agents for provider: %s", provider)
+    graphs = _agents_cache[provider] = {
+        "dashboard_agent": build_dashboard_agent(provider=provider),
+        "data_viz_agent": build_data_viz_agent(provider=provider),
+        "form_agent": build_form_agent(provider=provider),
+    }
+    agents = _agent_tuples[provider] = (
+        graphs["dashboard_agent"], graphs["data_viz_agent"], graphs["form_agent"]
+    )
+    logger.info("Agents built successfully for %s", provider)
+    return agents
 
-def get_agents(provider: str | None = None):
-    """Get or build agent graphs for a specific provider (lazy initialization)"""
-    if provider is None:
-        provider = os.getenv("LLM_PROVIDER", "anthropic").lower()
-
-    if provider not in _agents_cache:
-        print(f"Building LangGraph agents for provider: {provider}...")
-        _agents_cache[provider] = {
-            "dashboard": build_dashboard_agent(provider=provider),
-            "data_viz": build_data_viz_agent(provider=provider),
-            "form": build_form_agent(provider=provider),
-        }
-        print(f"[OK] Agents built successfully for {provider}")
+def load_agents(provider: str | None = None):
+    """Get or build agent graphs for a specific provider, blocking the caller"""
+    provider = resolve_provider(provider)
+    return _agent_tuples.get(provider) or _build_agents(provider)
 
-    cache = _agents_cache[provider]
-    return cache["dashboard"], cache["data_viz"], cache["form"]
+async def get_agents(provider: str | None = None):
+    """Get or build agent graphs for a specific provider (lazy initialization)"""
+    provider = resolve_provider(provider)
+    agents = _agent_tuples.get(provider)
+
+    if agents is None:
+        async with _build_locks[provider]:
+            # load_agents re-checks under the lock; compilation is synchronous,
+            # so keep it off the event loop
+            agents = await asyncio.to_thread(load_agents, provider)
+
+    return agents
+
+# Static JSON bodies, serialized once; handlers return them without encoding
+HEALTH_BODY: bytes = dumps_bytes({
+    "status": "ok",
+    "service": "ChatLangA2UI",
+    "version": "1.0.0",
+    "llm_provider": DEFAULT_PROVIDER,
+    "llm_model": DEFAULT_MODEL,
+})
+ROOT_BODY: bytes = dumps_bytes({
+    "service": "ChatLangA2UI",
+    "description": "AI-powered A2UI generation backend",
+    "endpoints": {
+        "health": "/health",
+        "agui-stream": "/agui/stream",
+        "copilotkit": "/copilotkit",
+        "test-dashboard": "/test/dashboard",
+        "docs": "/docs"
+    }
+})
 
 # Health check endpoint
-@app.get("/health")
+@app.get("/health", response_model=None, response_class=ORJSONResponse)
 def health_check():
     """Health check endpoint"""
-    provider = os.getenv("LLM_PROVIDER", "anthropic").lower()
-    model = (
-        os.getenv("GOOGLE_MODEL", "gemini-2.5-flash") if provider == "google"
-        else os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-5-20250929")
-    )
-    return {
-        "status": "ok",
-        "service": "ChatLangA2UI",
-        "version": "1.0.0",
-        "llm_provider": provider,
-        "llm_model": model,
-    }
+    return Response(content=HEALTH_BODY, media_type="application/json")
 
-@app.get("/")
+@app.get("/", response_model=None, response_class=ORJSONResponse)
 def root():
     """Root endpoint"""
-    return {
-        "service": "ChatLangA2UI",
-        "description": "AI-powered A2UI generation backend",
-        "endpoints": {
-            "health": "/health",
-            "agui-stream": "/agui/stream",
-            "copilotkit": "/copilotkit",
-            "test-dashboard": "/test/dashboard",
-            "docs": "/docs"
-        }
-    }
+    return Response(content=ROOT_BODY, media_type="application/json")
 
-@app.get("/test/dashboard")
+@app.get("/test/dashboard", response_model=None)
 async def test_dashboard():
     """Test endpoint that returns A2UI JSONL for a sample dashboard"""
-    # Sample A2UI JSONL for testing the renderer
-    a2ui_jsonl = """{"surfaceUpdate": {"surfaceId": "main", "components": [{"id": "title", "component": {"Text": {"text": {"literalString": "Sales Dashboard"}, "usage_hint": "title"}}}, {"id": "subtitle", "component": {"Text": {"text": {"literalString": "Q4 2024 Performance Overview"}, "usage_hint": "subtitle"}}}, {"id": "row1", "component": {"Row": {"children": ["card1", "card2", "card3"]}}}, {"id": "card1", "component": {"Card": {"title": {"literalString": "Total Revenue"}, "children": ["revenue_text"]}}}, {"id": "revenue_text", "component": {"Text": {"text": {"literalString": "$1,245,680"}, "usage_hint": "body"}}}, {"id": "card2", "component": {"Card": {"title": {"literalString": "New Customers"}, "children": ["customers_text"]}}}, {"id": "customers_text", "component": {"Text": {"text": {"literalString": "3,456"}, "usage_hint": "body"}}}, {"id": "card3", "component": {"Card": {"title": {"literalString": "Conversion Rate"}, "children": ["conversion_text"]}}}, {"id": "conversion_text", "component": {"Text": {"text": {"literalString": "24.5%"}, "usage_hint": "body"}}}, {"id": "chart_card", "component": {"Card": {"title": {"literalString": "Monthly Revenue Trend"}, "children": ["revenue_chart"]}}}, {"id": "revenue_chart", "component": {"Chart": {"config": {"type": "line", "xKey": "month", "yKey": "revenue", "dataPath": "/revenueData"}}}}, {"id": "table_card", "component": {"Card": {"title": {"literalString": "Top Products"}, "children": ["products_table"]}}}, {"id": "products_table", "component": {"Table": {"columns": [{"key": "product", "label": "Product", "type": "string"}, {"key": "sales", "label": "Sales", "type": "number"}, {"key": "revenue", "label": "Revenue", "type": "number"}], "dataPath": "/productsData"}}}]}}
-{"dataModelUpdate": {"surfaceId": "main", "path": "/revenueData", "contents": [{"key": "data", "valueArray": [{"month": "January", "revenue": 98000}, {"month": "February", "revenue": 105000}, {"month": "March", "revenue": 112000}, {"month": "April", "revenue": 108000}, {"month": "May", "revenue": 118000}, {"month": "June", "revenue": 125000}]}]}}
-{"dataModelUpdate": {"surfaceId": "main", "path": "/productsData", "contents": [{"key": "data", "valueArray": [{"product": "Widget Pro", "sales": 1250, "revenue": 125000}, {"product": "Gadget Plus", "sales": 980, "revenue": 98000}, {"product": "Tool Master", "sales": 875, "revenue": 87500}, {"product": "Device Elite", "sales": 650, "revenue": 65000}]}]}}
-{"beginRendering": {"surfaceId": "main"}}"""
+    return Response(content=TEST_DASHBOARD_NDJSON, media_type=NDJSON_MEDIA_TYPE)
 
-    return {"a2ui": a2ui_jsonl, "success": True}
+def _log_stream_size(stats: dict) -> None:
+    """Background task: log the size of a finished /api/generate stream"""
+    logger.info("Generated A2UI %d bytes", stats["nbytes"])
 
-@app.post("/api/generate")
+@app.post("/api/generate", response_model=None)
 async def generate_ui(request: dict):
     """Generate A2UI from user message using LangChain agents"""
-    from langchain_core.messages import HumanMessage
-
     message = request.get("message", "")
 
     if not message:
-        return {"error": "Message is required"}, 400
-
-    try:
-        print(f"\n[API] Generating UI for message: {message}")
-
-        # Get agents (lazy initialization)
-        dashboard_graph, _, _ = get_agents()
-
-        # For POC, use the dashboard agent for all requests
-        # In production, you'd route to appropriate agent based on message intent
-        result = await dashboard_graph.ainvoke({
-            "messages": [HumanMessage(content=message)],
-            "user_request": message,
-            "a2ui_output": {},
-            "error": None
-        })
-
-        print(f"[API] Agent result keys: {result.keys()}")
-
-        # Extract A2UI JSONL from agent result
-        a2ui_data = result.get("a2ui_output", {})
-        a2ui_jsonl = a2ui_data.get("jsonl", "")
-        reasoning = a2ui_data.get("reasoning", None)
-
-        if a2ui_jsonl:
-            print(f"[API] Successfully generated A2UI ({len(a2ui_jsonl)} chars)")
+        return ORJSONResponse({"error": "Message is required"}, status_code=400)
+
+    logger.info("Generating UI for message: %s", message)
+    stats = {"nbytes": 0}
+
+    async def counted(chunks):
+        """Pass chunks through, tallying bytes sent for the background log"""
+        async for chunk in chunks:
+            stats["nbytes"] += len(chunk)
+            yield chunk
+
+    async def ndjson_stream():
+        """Yield one A2UI message per line, then a trailing {"meta": ...} line"""
+        streamed_lines = []
+        try:
+            # Get agents (lazy initialization)
+            dashboard_graph, _, _ = await get_agents()
+
+            # For POC, use the dashboard agent for all requests
+            # In production, you'd route to appropriate agent based on message intent
+            # Identical concurrent requests share a single agent run
+            result = {}
+            async for kind, payload in stream_agent_run(
+                dashboard_graph,
+                agent_run_key(resolve_provider(), "dashboard_agent", message),
+                message,
+            ):
+                if kind == "a2ui":
+                    streamed_lines.append(payload)
+                    yield (payload + "\n").encode("utf-8")
+                elif kind == "result":
+                    result = payload
+
+            # Extract A2UI JSONL from agent result
+            a2ui_data = result.get("a2ui_output") or {}
+            lines, already_streamed = result_lines(a2ui_data, streamed_lines, result.get("error"))
+            reasoning = a2ui_data.get("reasoning")
+
+            if already_streamed is None:
+                # Handled below: end with an error meta, never a second surface
+                raise ValueError(result.get("error") or "Agent output diverged from the streamed messages")
+
+            if not lines:
+                raise ValueError("Agent did not return A2UI output")
+
+            logger.info("Successfully generated A2UI (%d messages)", len(lines))
             if reasoning:
-                print(f"[API] Reasoning: {reasoning}")
+                logger.debug("Reasoning: %s", reasoning)
 
-            return {
+            for line in lines[already_streamed:]:
+                yield (line + "\n").encode("utf-8")
+            yield dumps_bytes({"meta": {
                 "response": f"Generated UI for: {message}",
-                "a2ui": a2ui_jsonl,
                 "success": True,
-                "reasoning": reasoning
-            }
-        else:
-            raise ValueError("Agent did not return A2UI output")
-
-    except Exception as e:
-        print(f"[API] Error generating UI: {e}")
-        import traceback
-        traceback.print_exc()
-
-        # Return test dashboard as fallback
-        a2ui_jsonl = """{"surfaceUpdate": {"surfaceId": "main", "components": [{"id": "title", "component": {"Text": {"text": {"literalString": "Sales Dashboard"}, "usage_hint": "title"}}}, {"id": "subtitle", "component": {"Text": {"text": {"literalString": "Q4 2024 Performance Overview"}, "usage_hint": "subtitle"}}}, {"id": "row1", "component": {"Row": {"children": ["card1", "card2", "card3"]}}}, {"id": "card1", "component": {"Card": {"title": {"literalString": "Total Revenue"}, "children": ["revenue_text"]}}}, {"id": "revenue_text", "component": {"Text": {"text": {"literalString": "$1,245,680"}, "usage_hint": "body"}}}, {"id": "card2", "component": {"Card": {"title": {"literalString": "New Customers"}, "children": ["customers_text"]}}}, {"id": "customers_text", "component": {"Text": {"text": {"literalString": "3,456"}, "usage_hint": "body"}}}, {"id": "card3", "component": {"Card": {"title": {"literalString": "Conversion Rate"}, "children": ["conversion_text"]}}}, {"id": "conversion_text", "component": {"Text": {"text": {"literalString": "24.5%"}, "usage_hint": "body"}}}, {"id": "chart_card", "component": {"Card": {"title": {"literalString": "Monthly Revenue Trend"}, "children": ["revenue_chart"]}}}, {"id": "revenue_chart", "component": {"Chart": {"config": {"type": "line", "xKey": "month", "yKey": "revenue", "dataPath": "/revenueData"}}}}, {"id": "table_card", "component": {"Card": {"title": {"literalString": "Top Products"}, "children": ["products_table"]}}}, {"id": "products_table", "component": {"Table": {"columns": [{"key": "product", "label": "Product", "type": "string"}, {"key": "sales", "label": "Sales", "type": "number"}, {"key": "revenue", "label": "Revenue", "type": "number"}], "dataPath": "/productsData"}}}]}}
-{"dataModelUpdate": {"surfaceId": "main", "path": "/revenueData", "contents": [{"key": "data", "valueArray": [{"month": "January", "revenue": 98000}, {"month": "February", "revenue": 105000}, {"month": "March", "revenue": 112000}, {"month": "April", "revenue": 108000}, {"month": "May", "revenue": 118000}, {"month": "June", "revenue": 125000}]}]}}
-{"dataModelUpdate": {"surfaceId": "main", "path": "/productsData", "contents": [{"key": "data", "valueArray": [{"product": "Widget Pro", "sales": 1250, "revenue": 125000}, {"product": "Gadget Plus", "sales": 980, "revenue": 98000}, {"product": "Tool Master", "sales": 875, "revenue": 87500}, {"product": "Device Elite", "sales": 650, "revenue": 65000}]}]}}
-{"beginRendering": {"surfaceId": "main"}}"""
-
-        return {
-            "response": f"Generated UI (using fallback): {message}",
-            "a2ui": a2ui_jsonl,
-            "success": True,
-            "fallback": True,
-            "error": str(e)
-        }
+                "reasoning": reasoning,
+            }}) + b"\n"
+
+        except Exception as e:
+            logger.exception("Error generating UI: %s", e)
+
+            if streamed_lines:
+                # Messages already reached the client; don't splice the
+                # test dashboard onto a partial surface
+                yield dumps_bytes({"meta": {
+                    "response": f"Error generating UI for: {message}",
+                    "success": False,
+                    "error": str(e),
+                }}) + b"\n"
+                return
+
+            # Nothing streamed yet: return test dashboard as fallback
+            yield TEST_DASHBOARD_NDJSON
+            yield dumps_bytes({"meta": {
+                "response": f"Generated UI (using fallback): {message}",
+                "success": True,
+                "fallback": True,
+                "error": str(e),
+            }}) + b"\n"
+
+    return StreamingResponse(
+        counted(ndjson_stream()),
+        media_type=NDJSON_MEDIA_TYPE,
+        background=BackgroundTask(_log_stream_size, stats),
+    )
 
 # AG-UI streaming endpoint with SSE
-@app.post("/agui/stream")
 async def agui_stream(request: Request):
     """AG-UI protocol endpoint with SSE streaming"""
-    from app.agui_endpoint import agui_stream_endpoint
-    # Peek at the body to get provider (endpoint will also parse it)
-    body = await request.json()
-    provider = body.get("llm_provider", None)
-    dashboard_graph, data_viz_graph, form_graph = get_agents(provider)
-    return await agui_stream_endpoint(request, dashboard_graph, data_viz_graph, form_graph, body=body)
+    # Only llm_provider is needed here; the endpoint parses the full body once
+    provider = resolve_provider(peek_provider(await request.body()))
+    await get_agents(provider)  # Builds graphs on first use of a non-default provider
+    return await agui_stream_endpoint(request, provider)
+
+# Plain Starlette route: no FastAPI dependency solving or body handling per request
+app.router.add_route("/agui/stream", agui_stream, methods=["POST"])
 
-print("[OK] AG-UI streaming endpoint configured at /agui/stream")
+logger.debug("AG-UI streaming endpoint configured at /agui/stream")
 
 # CopilotKit integration will be added here
 # Note: The CopilotKit Python SDK API may vary. This is a placeholder for the integration.
 # The actual implementation depends on the installed copilotkit version.
 
 try:
-    # Attempt to import and configure CopilotKit
     from copilotkit.integrations.fastapi import add_fastapi_endpoint
     from copilotkit import CopilotKitRemoteEndpoint, LangGraphAgent
 
-    # Get agents (lazy initialization)
-    dashboard_graph, data_viz_graph, form_graph = get_agents()
-
-    # Wrap agents
-    agents = [
-        LangGraphAgent(
-            name="dashboard_agent",
-            description="Generates interactive dashboards with charts and tables",
-            agent=dashboard_graph,
-        ),
-        LangGraphAgent(
-            name="data_viz_agent",
-            description="Creates data visualizations and charts using A2UI",
-            agent=data_viz_graph,
-        ),
-        LangGraphAgent(
-            name="form_agent",
-            description="Generates interactive input forms",
-            agent=form_graph,
-        ),
-    ]
-
-    # Create CopilotKit Remote Endpoint with agents
-    remote = CopilotKitRemoteEndpoint(agents=agents)
-
-    # Add CopilotKit endpoint
-    add_fastapi_endpoint(app, remote, "/copilotkit")
-    print("[OK] CopilotKit endpoint configured at /copilotkit")
-
 except ImportError as e:
-    print(f"Warning: CopilotKit integration not available: {e}")
-    print("Install with: pip install copilotkit")
+    add_fastapi_endpoint = None
+    logger.warning("CopilotKit integration not available: %s", e)
+    logger.warning("Install with: pip install copilotkit")
 
     # Fallback: Create a simple endpoint for testing
-    @app.post("/copilotkit")
+    @app.post("/copilotkit", response_model=None, response_class=ORJSONResponse)
     async def copilotkit_fallback():
-        return {
+        return ORJSONResponse({
             "error": "CopilotKit not installed",
             "message": "Install copilotkit package to enable AG-UI protocol support"
-        }
+        })
 
-except Exception as e:
-    print(f"Error configuring CopilotKit: {e}")
-    print("Using fallback endpoint")
 
-    @app.post("/copilotkit")
-    async def copilotkit_error():
-        return {
+def setup_copilotkit(app: FastAPI) -> None:
+    """
+    Register the CopilotKit endpoint for the default provider's agents.
+
+    Called from the lifespan hook once the graphs are warm, so importing
+    this module never compiles agents.
+    """
+    if add_fastapi_endpoint is None:
+        return
+
+    try:
+        dashboard_graph, data_viz_graph, form_graph = load_agents(DEFAULT_PROVIDER)
+
+        # Wrap agents
+        agents = [
+            LangGraphAgent(
+                name="dashboard_agent",
+                description="Generates interactive dashboards with charts and tables",
+                agent=dashboard_graph,
+            ),
+            LangGraphAgent(
+                name="data_viz_agent",
+                description="Creates data visualizations and charts using A2UI",
+                agent=data_viz_graph,
+            ),
+            LangGraphAgent(
+                name="form_agent",
+                description="Generates interactive input forms",
+                agent=form_graph,
+            ),
+        ]
+
+        # Create CopilotKit Remote Endpoint with agents
+        remote = CopilotKitRemoteEndpoint(agents=agents)
+
+        # Add CopilotKit endpoint
+        add_fastapi_endpoint(app, remote, "/copilotkit")
+        logger.debug("CopilotKit endpoint configured at /copilotkit")
+
+    except Exception as e:
+        logger.error("Error configuring CopilotKit: %s", e)
+        logger.error("Using fallback endpoint")
+        error_body = {
             "error": "CopilotKit configuration failed",
             "message": str(e)
         }
 
+        async def copilotkit_error():
+            return ORJSONResponse(error_body)
+
+        app.add_api_route(
+            "/copilotkit",
+            copilotkit_error,
+            methods=["POST"],
+            response_model=None,
+            response_class=ORJSONResponse,
+        )
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", "8123"))
     host = os.getenv("HOST", "0.0.0.0")
+    # Auto-reload is for development and only supports a single worker
+    reload = os.getenv("RELOAD", "true").lower() == "true"
+    workers = 1 if reload else int(os.getenv("WORKERS", "1"))
+    # uvloop/httptools ship with uvicorn[standard]; uvloop is unavailable on Windows
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
 
     print(f"\n{'='*60}")
     print(f"Starting ChatLangA2UI Backend Server")
     print(f"{'='*60}")
     print(f"Host: {host}")
     print(f"Port: {port}")
+    print(f"Workers: {workers} (reload={'on' if reload else 'off'}, loop={loop}, http={http})")
     print(f"API Docs: http://localhost:{port}/docs")
     print(f"CopilotKit Endpoint: http://localhost:{port}/copilotkit")
     print(f"{'='*60}\n")
@@ -258,6 +409,11 @@ if __name__ == "__main__":
         "app.main:app",
         host=host,
         port=port,
-        reload=True,
+        reload=reload,
+        workers=workers,
+        loop=loop,
+        http=http,
+        limit_concurrency=int(os.getenv("LIMIT_CONCURRENCY", "1000")),
+        timeout_keep_alive=30,
         log_level="info"
     )
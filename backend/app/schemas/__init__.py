@@ -8,6 +8,8 @@ from .a2ui_models import (
     BeginRendering,
     A2UIComponent,
     ComponentType,
+    A2UI_MESSAGE_ADAPTER,
+    A2UI_MESSAGES_ADAPTER,
 )
 
 __all__ = [
@@ -18,4 +20,6 @@ __all__ = [
     "BeginRendering",
     "A2UIComponent",
     "ComponentType",
+    "A2UI_MESSAGE_ADAPTER",
+    "A2UI_MESSAGES_ADAPTER",
 ]
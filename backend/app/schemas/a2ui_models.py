@@ -5,8 +5,17 @@ These models define the A2UI (Agent-to-User Interface) protocol structure
 for generating declarative UI components from LLMs.
 """
 
-from typing import Dict, List, Optional, Union, Any
-from pydantic import BaseModel, Field
+from typing import Annotated, Any, Callable, Dict, List, Optional, Tuple, Union
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Discriminator,
+    Field,
+    Tag,
+    TypeAdapter,
+    field_validator,
+)
+from pydantic.json_schema import SkipJsonSchema
 from enum import Enum
 
 
@@ -24,58 +33,71 @@ class ComponentType(str, Enum):
     DATE_TIME_INPUT = "DateTimeInput"
 
 
+class A2UIBaseModel(BaseModel):
+    """
+    Base for A2UI protocol models.
+    Instances are immutable once validated; unknown fields from the LLM are dropped.
+    """
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+
+class A2UIComponentModel(A2UIBaseModel):
+    """Base for component props: unknown props pass through to the renderer"""
+    model_config = ConfigDict(extra="allow")
+
+
 # ============================================================================
 # Component Property Models
 # ============================================================================
 
-class LiteralString(BaseModel):
+class LiteralString(A2UIComponentModel):
     """String wrapper for A2UI text values"""
     literalString: str
 
 
-class TextComponent(BaseModel):
+class TextComponent(A2UIComponentModel):
     """Text display component"""
     text: LiteralString
     usage_hint: Optional[str] = Field(default="body", description="title, subtitle, or body")
 
 
-class ButtonComponent(BaseModel):
+class ButtonComponent(A2UIComponentModel):
     """Interactive button component"""
     text: LiteralString
     actionId: str = Field(description="Identifier for button action")
     usage_hint: Optional[str] = Field(default="primary", description="primary or secondary")
 
 
-class RowComponent(BaseModel):
+class RowComponent(A2UIComponentModel):
     """Horizontal layout container"""
     children: List[str] = Field(description="List of child component IDs")
 
 
-class ColumnComponent(BaseModel):
+class ColumnComponent(A2UIComponentModel):
     """Vertical layout container"""
     children: List[str] = Field(description="List of child component IDs")
 
 
-class CardComponent(BaseModel):
+class CardComponent(A2UIComponentModel):
     """Card container with optional title"""
     children: List[str] = Field(description="List of child component IDs")
     title: Optional[LiteralString] = None
 
 
-class TableColumn(BaseModel):
+class TableColumn(A2UIComponentModel):
     """Table column definition"""
     key: str = Field(description="Data key for this column")
     label: str = Field(description="Display label for column header")
     type: str = Field(default="string", description="Data type: string, number, boolean")
 
 
-class TableComponent(BaseModel):
+class TableComponent(A2UIComponentModel):
     """Data table component"""
     columns: List[TableColumn] = Field(description="Column definitions")
     dataPath: str = Field(description="Path in data model to bind table data")
 
 
-class ChartConfig(BaseModel):
+class ChartConfig(A2UIComponentModel):
     """Chart configuration"""
     type: str = Field(description="Chart type: line, bar, pie, area")
     xKey: str = Field(description="Data key for X-axis")
@@ -83,48 +105,188 @@ class ChartConfig(BaseModel):
     dataPath: str = Field(description="Path in data model to bind chart data")
 
 
-class ChartComponent(BaseModel):
+class ChartComponent(A2UIComponentModel):
     """Chart/visualization component"""
     config: ChartConfig
     title: Optional[LiteralString] = None
 
 
-class TextFieldComponent(BaseModel):
+class TextFieldComponent(A2UIComponentModel):
     """Text input field"""
     label: LiteralString
     bindingPath: str = Field(description="Path in data model to bind value")
     placeholder: Optional[LiteralString] = None
 
 
-class DateTimeInputComponent(BaseModel):
+class DateTimeInputComponent(A2UIComponentModel):
     """Date/time input field"""
     label: LiteralString
     bindingPath: str = Field(description="Path in data model to bind value")
     mode: Optional[str] = Field(default="date", description="date, time, or datetime")
 
 
-class FormComponent(BaseModel):
+class FormComponent(A2UIComponentModel):
     """Form container"""
     children: List[str] = Field(description="List of child component IDs")
     submitActionId: str = Field(description="Action ID for form submission")
 
 
+# ============================================================================
+# Component Entries
+# ============================================================================
+# A component is serialized as {"<ComponentType>": {...props}}. Each entry
+# model has exactly one field named after its type, so the wire shape is
+# unchanged while validation dispatches on that key.
+
+class TextEntry(A2UIComponentModel):
+    Text: TextComponent
+
+
+class ButtonEntry(A2UIComponentModel):
+    Button: ButtonComponent
+
+
+class CardEntry(A2UIComponentModel):
+    Card: CardComponent
+
+
+class RowEntry(A2UIComponentModel):
+    Row: RowComponent
+
+
+class ColumnEntry(A2UIComponentModel):
+    Column: ColumnComponent
+
+
+class TableEntry(A2UIComponentModel):
+    Table: TableComponent
+
+
+class ChartEntry(A2UIComponentModel):
+    Chart: ChartComponent
+
+
+class FormEntry(A2UIComponentModel):
+    Form: FormComponent
+
+
+class TextFieldEntry(A2UIComponentModel):
+    TextField: TextFieldComponent
+
+
+class DateTimeInputEntry(A2UIComponentModel):
+    DateTimeInput: DateTimeInputComponent
+
+
+_COMPONENT_ENTRIES: Dict[str, type] = {
+    ComponentType.TEXT.value: TextEntry,
+    ComponentType.BUTTON.value: ButtonEntry,
+    ComponentType.CARD.value: CardEntry,
+    ComponentType.ROW.value: RowEntry,
+    ComponentType.COLUMN.value: ColumnEntry,
+    ComponentType.TABLE.value: TableEntry,
+    ComponentType.CHART.value: ChartEntry,
+    ComponentType.FORM.value: FormEntry,
+    ComponentType.TEXT_FIELD.value: TextFieldEntry,
+    ComponentType.DATE_TIME_INPUT.value: DateTimeInputEntry,
+}
+_ENTRY_TAGS: Dict[type, str] = {entry: tag for tag, entry in _COMPONENT_ENTRIES.items()}
+
+# Tag for component types outside the catalog; kept as raw dicts
+_CUSTOM_COMPONENT_TAG = "custom"
+
+
+def _component_tag(value: Any) -> str:
+    """Discriminator for component entries: the entry's single type key"""
+    if isinstance(value, dict):
+        if len(value) == 1:
+            key = next(iter(value))
+            if key in _COMPONENT_ENTRIES:
+                return key
+        return _CUSTOM_COMPONENT_TAG
+    return _ENTRY_TAGS.get(type(value), _CUSTOM_COMPONENT_TAG)
+
+
+# Raw-dict fallback: entries the catalog models reject are passed through
+# as-is, and it is left out of the JSON schema so the tool schema only
+# advertises the catalog shapes.
+_RawComponent = SkipJsonSchema[Dict[str, Any]]
+
+
+ComponentPayload = Annotated[
+    Union[
+        Annotated[
+            Union[TextEntry, _RawComponent],
+            Field(union_mode="left_to_right"),
+            Tag(ComponentType.TEXT.value),
+        ],
+        Annotated[
+            Union[ButtonEntry, _RawComponent],
+            Field(union_mode="left_to_right"),
+            Tag(ComponentType.BUTTON.value),
+        ],
+        Annotated[
+            Union[CardEntry, _RawComponent],
+            Field(union_mode="left_to_right"),
+            Tag(ComponentType.CARD.value),
+        ],
+        Annotated[
+            Union[RowEntry, _RawComponent],
+            Field(union_mode="left_to_right"),
+            Tag(ComponentType.ROW.value),
+        ],
+        Annotated[
+            Union[ColumnEntry, _RawComponent],
+            Field(union_mode="left_to_right"),
+            Tag(ComponentType.COLUMN.value),
+        ],
+        Annotated[
+            Union[TableEntry, _RawComponent],
+            Field(union_mode="left_to_right"),
+            Tag(ComponentType.TABLE.value),
+        ],
+        Annotated[
+            Union[ChartEntry, _RawComponent],
+            Field(union_mode="left_to_right"),
+            Tag(ComponentType.CHART.value),
+        ],
+        Annotated[
+            Union[FormEntry, _RawComponent],
+            Field(union_mode="left_to_right"),
+            Tag(ComponentType.FORM.value),
+        ],
+        Annotated[
+            Union[TextFieldEntry, _RawComponent],
+            Field(union_mode="left_to_right"),
+            Tag(ComponentType.TEXT_FIELD.value),
+        ],
+        Annotated[
+            Union[DateTimeInputEntry, _RawComponent],
+            Field(union_mode="left_to_right"),
+            Tag(ComponentType.DATE_TIME_INPUT.value),
+        ],
+        Annotated[_RawComponent, Tag(_CUSTOM_COMPONENT_TAG)],
+    ],
+    Discriminator(_component_tag),
+]
+
+
 # ============================================================================
 # A2UI Message Models
 # ============================================================================
 
-class A2UIComponent(BaseModel):
+class A2UIComponent(A2UIBaseModel):
     """
     A2UI component with ID and type-specific data.
     Uses flat adjacency-list structure (not nested).
     """
     id: str = Field(description="Unique component identifier")
-    component: Dict[str, Any] = Field(
+    component: ComponentPayload = Field(
         description="Component type and properties. Key is ComponentType, value is component data."
     )
 
 
-class SurfaceUpdate(BaseModel):
+class SurfaceUpdate(A2UIBaseModel):
     """
     Surface update message - defines UI components.
     First message in A2UI sequence.
@@ -133,7 +295,7 @@ class SurfaceUpdate(BaseModel):
     components: List[A2UIComponent] = Field(description="List of components to display")
 
 
-class DataModelContent(BaseModel):
+class DataModelContent(A2UIBaseModel):
     """Individual data item in data model"""
     key: str
     valueString: Optional[str] = None
@@ -142,7 +304,75 @@ class DataModelContent(BaseModel):
     valueArray: Optional[List[Any]] = None
 
 
-class DataModelUpdate(BaseModel):
+# Raw value type -> (content field, converter), shared with A2UIBuilder.add_data.
+# Exact-type lookup, so bool is its own key and never lands in valueNumber.
+ContentValueSetter = Tuple[str, Optional[Callable[[Any], Any]]]
+CONTENT_VALUE_SETTERS: Dict[type, ContentValueSetter] = {
+    str: ("valueString", None),
+    bool: ("valueBoolean", None),
+    int: ("valueNumber", float),
+    float: ("valueNumber", float),
+    list: ("valueArray", None),
+}
+
+
+def content_value_setter(value: Any) -> Optional[ContentValueSetter]:
+    """Look up the content field for a raw value, falling back to isinstance for subclasses"""
+    setter = CONTENT_VALUE_SETTERS.get(type(value))
+    if setter is None:
+        # Ordered so a bool subclass still matches bool before int
+        for value_type, candidate in CONTENT_VALUE_SETTERS.items():
+            if isinstance(value, value_type):
+                return candidate
+    return setter
+
+
+def _is_content_item(item: Any) -> bool:
+    return isinstance(item, DataModelContent) or (isinstance(item, dict) and "key" in item)
+
+
+def _normalize_data_model_contents(contents):
+    """Normalize dataModelUpdate contents into the expected list format.
+
+    Gemini may return contents as a dict instead of a list of DataModelContent objects.
+    This converts various shapes into the canonical: [{"key": "...", "valueArray|valueString|...": ...}]
+    """
+    if isinstance(contents, list):
+        # Already canonical - return as-is without rebuilding the list
+        if all(_is_content_item(item) for item in contents):
+            return contents
+        normalized = []
+        for item in contents:
+            if _is_content_item(item):
+                normalized.append(item)
+            else:
+                # Raw data item in a list, wrap it
+                normalized.append({"key": "data", "valueArray": contents})
+                return normalized
+        return normalized
+
+    if isinstance(contents, dict):
+        # Dict with key/value pairs - convert each to a DataModelContent
+        if "key" in contents:
+            # Single DataModelContent as a dict
+            return [contents]
+        if "valueArray" in contents:
+            # Missing "key" wrapper
+            return [{"key": "data", "valueArray": contents["valueArray"]}]
+        # Dict of key-value pairs like {"totalSales": "$1.2M", ...}
+        result = []
+        for key, value in contents.items():
+            setter = content_value_setter(value)
+            if setter is None:
+                continue
+            value_key, convert = setter
+            result.append({"key": key, value_key: convert(value) if convert else value})
+        return result
+
+    return [{"key": "data", "valueString": str(contents)}]
+
+
+class DataModelUpdate(A2UIBaseModel):
     """
     Data model update message - provides data for components.
     Second message in A2UI sequence.
@@ -151,8 +381,13 @@ class DataModelUpdate(BaseModel):
     path: Optional[str] = Field(default="/", description="Path in data model")
     contents: List[DataModelContent] = Field(description="Data items")
 
+    @field_validator("contents", mode="before")
+    @classmethod
+    def _normalize_contents(cls, value: Any) -> Any:
+        return _normalize_data_model_contents(value)
 
-class BeginRendering(BaseModel):
+
+class BeginRendering(A2UIBaseModel):
     """
     Begin rendering signal - tells frontend to render the UI.
     Final message in A2UI sequence.
@@ -160,7 +395,7 @@ class BeginRendering(BaseModel):
     surfaceId: str
 
 
-class A2UIMessage(BaseModel):
+class A2UIMessage(A2UIBaseModel):
     """
     A2UI protocol message.
     Each JSONL line is one message with one of these fields populated.
@@ -175,7 +410,7 @@ class A2UIMessage(BaseModel):
 # Structured Output Schema for Claude
 # ============================================================================
 
-class A2UIGenerationOutput(BaseModel):
+class A2UIGenerationOutput(A2UIBaseModel):
     """
     Schema for Claude to generate complete A2UI interfaces.
     This is what Claude returns via structured output.
@@ -189,6 +424,11 @@ class A2UIGenerationOutput(BaseModel):
     )
 
 
+# Precompiled validators/serializers for one A2UI message and a bare list of them
+A2UI_MESSAGE_ADAPTER = TypeAdapter(A2UIMessage)
+A2UI_MESSAGES_ADAPTER = TypeAdapter(List[A2UIMessage])
+
+
 # ============================================================================
 # Helper Schemas
 # ============================================================================
@@ -1,6 +1,15 @@
 """Utilities package for A2UI building and prompt loading."""
 
 from .a2ui_builder import A2UIBuilder
-from .prompt_loader import load_prompt_template, load_agent_config
+from .prompt_loader import load_prompt_template, load_agent_config, reload_prompts
+from .semantic_cache import SemanticCache
+from .json_stream import MessageStreamParser
 
-__all__ = ["A2UIBuilder", "load_prompt_template", "load_agent_config"]
+__all__ = [
+    "A2UIBuilder",
+    "load_prompt_template",
+    "load_agent_config",
+    "reload_prompts",
+    "SemanticCache",
+    "MessageStreamParser",
+]
@@ -5,17 +5,15 @@ Provides helper methods for constructing A2UI messages and converting
 structured output to JSONL format for streaming to the frontend.
 """
 
-import json
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from app.schemas.a2ui_models import (
     A2UIMessage,
-    SurfaceUpdate,
-    DataModelUpdate,
-    BeginRendering,
-    A2UIComponent,
-    DataModelContent,
     A2UIGenerationOutput,
+    A2UI_MESSAGE_ADAPTER,
+    content_value_setter,
 )
+from app.utils.json_codec import dumps_bytes, loads
 
 
 class A2UIBuilder:
@@ -31,12 +29,19 @@ class A2UIBuilder:
         jsonl = builder.build_jsonl()
     """
 
-    def __init__(self, surface_id: str = "main"):
+    def __init__(self, surface_id: str = "main") -> None:
         self.surface_id = surface_id
-        self.components: List[A2UIComponent] = []
-        self.data_updates: List[DataModelUpdate] = []
-
-    def add_component(self, component_id: str, component_type: str, **props) -> "A2UIBuilder":
+        # Components serialized once on append, straight from the wire-shaped
+        # dicts (no Pydantic validation or model_dump), so build_jsonl only
+        # joins bytes; the single source of truth for the surface
+        self._component_parts: List[bytes] = []
+        # Data model as path -> key -> (value field, value); wire dicts are
+        # only materialized when a path's frame is serialized
+        self._data: Dict[str, Dict[str, Tuple[Optional[str], Any]]] = {}
+        # path -> serialized dataModelUpdate frame, dropped when the path changes
+        self._data_frames: Dict[str, bytes] = {}
+
+    def add_component(self, component_id: str, component_type: str, **props: Any) -> "A2UIBuilder":
         """
         Add a component to the surface.
 
@@ -45,11 +50,24 @@ class A2UIBuilder:
             component_type: Type of component (Text, Card, Table, etc.)
             **props: Component-specific properties
         """
-        component = A2UIComponent(
-            id=component_id,
-            component={component_type: props}
-        )
-        self.components.append(component)
+        component = {
+            "id": component_id,
+            "component": {component_type: props}
+        }
+        self._component_parts.append(dumps_bytes(component))
+        return self
+
+    def extend_components(self, raws: List[Dict[str, Any]]) -> "A2UIBuilder":
+        """
+        Append pre-built components in one call.
+
+        Each dict must already be in wire shape and is not validated, e.g.
+        ``{"id": "title", "component": {"Text": {"text": {"literalString": "Hi"}}}}``.
+
+        Args:
+            raws: Component dicts with "id" and a single-key "component" mapping
+        """
+        self._component_parts.extend(map(dumps_bytes, raws))
         return self
 
     def add_text(
@@ -89,7 +107,7 @@ class A2UIBuilder:
         children: List[str]
     ) -> "A2UIBuilder":
         """Add a Card component"""
-        props = {"children": children}
+        props: Dict[str, Any] = {"children": children}
         if title:
             props["title"] = {"literalString": title}
         return self.add_component(component_id, "Card", **props)
@@ -143,7 +161,7 @@ class A2UIBuilder:
             data_path: Path in data model (e.g., "/salesData")
             title: Optional chart title
         """
-        props = {
+        props: Dict[str, Any] = {
             "config": {
                 "type": chart_type,
                 "xKey": x_key,
@@ -177,7 +195,7 @@ class A2UIBuilder:
         placeholder: Optional[str] = None
     ) -> "A2UIBuilder":
         """Add a TextField component"""
-        props = {
+        props: Dict[str, Any] = {
             "label": {"literalString": label},
             "bindingPath": binding_path
         }
@@ -189,65 +207,140 @@ class A2UIBuilder:
         """
         Add data to the data model.
 
+        Repeated calls for the same path are merged into one dataModelUpdate
+        frame (later keys win); the protocol carries a single path per frame,
+        so different paths still get their own frames.
+
         Args:
             path: Path in data model (e.g., "/salesData", "/products")
             data: Dictionary of data items
         """
-        contents = []
+        entries = self._data.setdefault(path, {})
         for key, value in data.items():
-            content = DataModelContent(key=key)
-            if isinstance(value, str):
-                content.valueString = value
-            elif isinstance(value, bool):
-                content.valueBoolean = value
-            elif isinstance(value, (int, float)):
-                content.valueNumber = float(value)
-            elif isinstance(value, list):
-                content.valueArray = value
-            contents.append(content)
-
-        update = DataModelUpdate(
-            surfaceId=self.surface_id,
-            path=path,
-            contents=contents
-        )
-        self.data_updates.append(update)
+            setter = content_value_setter(value)
+            if setter is None:
+                entries[key] = (None, None)
+            else:
+                field, convert = setter
+                entries[key] = (field, convert(value) if convert else value)
+
+        self._data_frames.pop(path, None)
         return self
 
-    def build_jsonl(self) -> str:
-        """
-        Build JSONL output for streaming to frontend.
+    def _data_update(self, path: str) -> Dict[str, Any]:
+        """Materialize the wire-shaped dataModelUpdate body for one path"""
+        return {
+            "surfaceId": self.surface_id,
+            "path": path,
+            "contents": [
+                {"key": key} if field is None else {"key": key, field: value}
+                for key, (field, value) in self._data[path].items()
+            ]
+        }
 
-        Returns:
-            JSONL string with messages in sequence:
-            1. surfaceUpdate (components)
-            2. dataModelUpdate(s) (data)
-            3. beginRendering (signal to render)
+    @property
+    def components(self) -> List[Dict[str, Any]]:
+        """Wire-shaped component dicts, decoded from the serialized parts"""
+        return [loads(part) for part in self._component_parts]
+
+    @property
+    def data_updates(self) -> List[Dict[str, Any]]:
+        """Wire-shaped dataModelUpdate bodies, one per data path"""
+        return [self._data_update(path) for path in self._data]
+
+    def _iter_frames(self) -> Iterator[bytes]:
         """
-        messages = []
+        Yield each serialized message, in sequence:
+        1. surfaceUpdate (components)
+        2. dataModelUpdate(s) (data)
+        3. beginRendering (signal to render)
+        """
+        surface_id = dumps_bytes(self.surface_id)
 
         # 1. surfaceUpdate with all components
-        if self.components:
-            surface_update = A2UIMessage(
-                surfaceUpdate=SurfaceUpdate(
-                    surfaceId=self.surface_id,
-                    components=self.components
-                )
+        if self._component_parts:
+            yield (
+                b'{"surfaceUpdate":{"surfaceId":' + surface_id
+                + b',"components":[' + b",".join(self._component_parts) + b"]}}"
             )
-            messages.append(json.dumps(surface_update.model_dump(exclude_none=True)))
 
         # 2. dataModelUpdate(s) with data
-        for data_update in self.data_updates:
-            data_msg = A2UIMessage(dataModelUpdate=data_update)
-            messages.append(json.dumps(data_msg.model_dump(exclude_none=True)))
+        for path in self._data:
+            frame = self._data_frames.get(path)
+            if frame is None:
+                frame = self._data_frames[path] = dumps_bytes(
+                    {"dataModelUpdate": self._data_update(path)}
+                )
+            yield frame
 
         # 3. beginRendering signal
-        begin_msg = A2UIMessage(
-            beginRendering=BeginRendering(surfaceId=self.surface_id)
-        )
-        messages.append(json.dumps(begin_msg.model_dump(exclude_none=True)))
+        yield b'{"beginRendering":{"surfaceId":' + surface_id + b"}}"
+
+    def iter_messages(self) -> Iterator[bytes]:
+        """
+        Yield newline-terminated JSONL frames for streaming to frontend.
+
+        Each frame is serialized only when requested, so the first one can be
+        sent before later ones are assembled:
+
+            StreamingResponse(builder.iter_messages(), media_type="application/x-ndjson")
+        """
+        for frame in self._iter_frames():
+            yield frame + b"\n"
+
+    def build_jsonl_bytes(self) -> bytes:
+        """
+        Build JSONL output for streaming to frontend, as UTF-8 bytes.
 
-        return "\n".join(messages)
+        Returns:
+            JSONL bytes, one message per line, without a trailing newline
+        """
+        return b"\n".join(self._iter_frames())
+
+    def build_jsonl(self) -> str:
+        """
+        Build JSONL output for streaming to frontend.
+
+        Returns:
+            JSONL string; see build_jsonl_bytes for the message sequence
+        """
+        return self.build_jsonl_bytes().decode("utf-8")
+
+    @staticmethod
+    def serialize_message(msg: A2UIMessage) -> str:
+        """Serialize a single A2UI message to one JSONL line"""
+        # Serialized straight from the model in Rust, without an intermediate dict
+        return A2UI_MESSAGE_ADAPTER.dump_json(msg, exclude_none=True).decode("utf-8")
+
+    @staticmethod
+    def structured_output_lines(output: A2UIGenerationOutput) -> List[str]:
+        """
+        Convert Claude's structured output to a list of JSONL lines.
+
+        Args:
+            output: A2UIGenerationOutput from Claude
+
+        Returns:
+            One serialized message per line, without newlines
+        """
+        # Messages are already validated; dump each straight from the model
+        # in pydantic-core rather than walking it into dicts in Python
+        dump_json = A2UI_MESSAGE_ADAPTER.dump_json
+        return [dump_json(msg, exclude_none=True).decode("utf-8") for msg in output.messages]
+
+    @staticmethod
+    def from_structured_output_bytes(output: A2UIGenerationOutput) -> bytes:
+        """
+        Convert Claude's structured output to JSONL format, as UTF-8 bytes.
+
+        Args:
+            output: A2UIGenerationOutput from Claude
+
+        Returns:
+            JSONL bytes ready for streaming, without a trailing newline
+        """
+        dump_json = A2UI_MESSAGE_ADAPTER.dump_json
+        return b"\n".join(dump_json(msg, exclude_none=True) for msg in output.messages)
 
     @staticmethod
     def from_structured_output(output: A2UIGenerationOutput) -> str:
@@ -260,22 +353,23 @@ class A2UIBuilder:
         Returns:
             JSONL string ready for streaming
         """
-        jsonl_lines = []
-        for msg in output.messages:
-            jsonl_lines.append(json.dumps(msg.model_dump(exclude_none=True)))
-        return "\n".join(jsonl_lines)
+        return "\n".join(A2UIBuilder.structured_output_lines(output))
 
     def clear(self) -> "A2UIBuilder":
         """Clear all components and data"""
-        self.components = []
-        self.data_updates = []
+        self._component_parts = []
+        self._data = {}
+        self._data_frames = {}
         return self
 
 
+@lru_cache(maxsize=None)
 def create_sample_dashboard() -> str:
     """
     Create a sample dashboard for testing.
 
+    The output is deterministic, so it is built once and memoized.
+
     Returns:
         JSONL string for a sample sales dashboard
     """
@@ -0,0 +1,64 @@
+"""
+In-flight Request Coalescing
+
+De-duplicates concurrent identical agent runs: while a run for a key is in
+progress, later callers share its future instead of starting another LLM
+call. Complements the semantic cache, which only helps once a run finished.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class InflightCoalescer:
+    """
+    Share one in-progress coroutine between concurrent callers with the same key.
+
+    Usage:
+        run = coalescer.get_or_start(key, lambda: graph.ainvoke(inputs))
+        result = await asyncio.shield(run)
+
+    Await the future through ``asyncio.shield`` so a disconnecting caller
+    does not cancel the run for everyone else sharing it.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def get_or_start(
+        self,
+        key: Hashable,
+        coro_factory: Callable[[], Awaitable[Any]],
+    ) -> asyncio.Future:
+        """
+        Return the in-flight future for key, starting coro_factory() if there is none.
+
+        Args:
+            key: Identity of the run (e.g. provider, agent name, message)
+            coro_factory: Called only when no run is in flight for key
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(coro_factory())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._release(key, done))
+        return future
+
+    def _release(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+
+def agent_run_key(provider: str, agent_name: str, message: str) -> tuple:
+    """
+    Coalescing key for an agent run on a user message.
+
+    Only surrounding whitespace is ignored; any other difference (symbols,
+    punctuation, non-Latin text) must start its own run, since joiners
+    receive the shared result verbatim.
+    """
+    return (provider, agent_name, message.strip())
+
+
+# Process-wide coalescer shared by the HTTP endpoints
+agent_runs = InflightCoalescer()
@@ -0,0 +1,34 @@
+"""
+JSON Codec
+
+Fast JSON helpers for hot serialization paths. Uses orjson when it is
+installed and falls back to the stdlib json module otherwise.
+"""
+
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    import json
+
+
+if orjson is not None:
+    dumps_bytes = orjson.dumps
+
+    def dumps(obj: Any) -> str:
+        """Serialize obj to a compact JSON string"""
+        return orjson.dumps(obj).decode("utf-8")
+
+    loads = orjson.loads
+else:
+    def dumps(obj: Any) -> str:
+        """Serialize obj to a compact JSON string"""
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+    def dumps_bytes(obj: Any) -> bytes:
+        """Serialize obj to compact UTF-8 encoded JSON"""
+        return dumps(obj).encode("utf-8")
+
+    loads = json.loads
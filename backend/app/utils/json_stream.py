@@ -0,0 +1,99 @@
+"""
+Incremental JSON Stream Parser
+
+Extracts complete objects from a JSON array while the surrounding document
+is still being generated, so A2UI messages can be forwarded as soon as the
+LLM closes each one.
+"""
+
+import re
+from typing import Any, Dict, List
+
+from app.utils.json_codec import loads
+
+
+class MessageStreamParser:
+    """
+    Incremental parser for the top-level ``messages`` array of an LLM response.
+
+    Usage:
+        parser = MessageStreamParser()
+        for chunk in token_stream:
+            for message in parser.feed(chunk):
+                ...  # each message is a fully parsed dict
+    """
+
+    def __init__(self, array_key: str = "messages"):
+        self._key_re = re.compile(r'"%s"\s*:\s*\[' % re.escape(array_key))
+        self._text = ""
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_array = False
+        self._in_string = False
+        self._escape = False
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Consume the next chunk of text.
+
+        Args:
+            chunk: Raw text delta from the LLM
+
+        Returns:
+            Array items completed by this chunk, in order
+        """
+        if self.done or not chunk:
+            return []
+        self._text += chunk
+
+        if not self._in_array:
+            match = self._key_re.search(self._text)
+            if not match:
+                return []
+            self._in_array = True
+            self._text = self._text[match.end():]
+            self._pos = 0
+
+        items = []
+        text = self._text
+        i = self._pos
+        while i < len(text):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{" or ch == "[":
+                if self._depth == 0 and ch == "{":
+                    self._start = i
+                self._depth += 1
+            elif ch == "}" or ch == "]":
+                if self._depth == 0:
+                    # Closing bracket of the array itself
+                    self.done = True
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._start >= 0:
+                    try:
+                        items.append(loads(text[self._start:i + 1]))
+                    except ValueError:
+                        pass
+                    self._start = -1
+            i += 1
+
+        # Drop consumed text, keeping only a partially received item
+        if self._start >= 0:
+            self._text = text[self._start:]
+            self._pos = i - self._start
+            self._start = 0
+        else:
+            self._text = text[i:]
+            self._pos = 0
+        return items
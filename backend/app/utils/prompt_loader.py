@@ -6,33 +6,39 @@ configurations from Markdown files.
 """
 
 import os
+import re
+import string
 import yaml
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any
 
+# libyaml's C loader is several times faster; fall back when PyYAML lacks it
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
 
-def load_prompt_template(prompt_name: str) -> str:
-    """
-    Load a prompt template from YAML file.
+# Resolved once at import rather than on every load
+_PROMPTS_DIR = Path(__file__).resolve().parent.parent / "prompts"
+_AGENTS_DIR = Path(__file__).resolve().parent.parent.parent / "configs" / "agents"
+_CATALOG_DIR = Path(__file__).resolve().parent.parent.parent / "configs" / "catalog"
 
-    Args:
-        prompt_name: Name of the prompt file (without .yaml extension)
+# Config files are small; one 64 KiB read covers them in a single syscall
+_READ_BUFFER_SIZE = 1 << 16
 
-    Returns:
-        Template string
+# Level-2 Markdown headers and "- item" / "* item" bullets in agent configs
+_SECTION_RE = re.compile(r"(?m)^## +(.*?)[ \t\r]*$")
+_BULLET_RE = re.compile(r"(?m)^[ \t]*[-*] [ \t]*(\S.*?)[ \t\r]*$")
 
-    Raises:
-        FileNotFoundError: If prompt file doesn't exist
-        ValueError: If prompt format is invalid
-    """
-    base_path = Path(__file__).parent.parent / "prompts"
-    yaml_path = base_path / f"{prompt_name}.yaml"
 
-    if not yaml_path.exists():
-        raise FileNotFoundError(f"Prompt template not found: {yaml_path}")
+def _parse_prompt_file(yaml_path: Path) -> str:
+    """Read and validate one prompt YAML file, resolving template_path includes"""
+    base_path = yaml_path.parent
 
-    with open(yaml_path, 'r', encoding='utf-8') as f:
-        prompt_config = yaml.safe_load(f)
+    # libyaml decodes the raw bytes itself
+    with open(os.fspath(yaml_path), 'rb', buffering=_READ_BUFFER_SIZE) as f:
+        prompt_config = yaml.load(f.read(), Loader=_SafeLoader)
 
     if not prompt_config:
         raise ValueError(f"Empty prompt file: {yaml_path}")
@@ -45,7 +51,7 @@ def load_prompt_template(prompt_name: str) -> str:
         template_path = base_path / prompt_config["template_path"]
         if not template_path.exists():
             raise FileNotFoundError(f"Template file not found: {template_path}")
-        with open(template_path, 'r', encoding='utf-8') as f:
+        with open(os.fspath(template_path), 'r', encoding='utf-8', buffering=_READ_BUFFER_SIZE) as f:
             return f.read()
     elif "template" in prompt_config:
         return prompt_config["template"]
@@ -53,10 +59,59 @@ def load_prompt_template(prompt_name: str) -> str:
         raise ValueError(f"No template or template_path found in {yaml_path}")
 
 
+# Prompt name -> validated template text, built at import by reload_prompts()
+_PROMPT_REGISTRY: Dict[str, str] = {}
+
+
+def reload_prompts() -> None:
+    """
+    Re-read and validate every prompt under the prompts directory.
+
+    Runs once at import, so a malformed prompt fails at startup rather than
+    mid-request. Call it in development after editing a prompt file.
+
+    Raises:
+        FileNotFoundError: If a template_path include is missing
+        ValueError: If a prompt file is invalid
+    """
+    global _PROMPT_REGISTRY
+    _PROMPT_REGISTRY = {
+        yaml_path.stem: _parse_prompt_file(yaml_path)
+        for yaml_path in sorted(_PROMPTS_DIR.glob("*.yaml"))
+    }
+
+
+reload_prompts()
+
+
+def load_prompt_template(prompt_name: str) -> str:
+    """
+    Load a prompt template from YAML file.
+
+    Templates are parsed and validated once at import (see reload_prompts),
+    so this is a dictionary lookup.
+
+    Args:
+        prompt_name: Name of the prompt file (without .yaml extension)
+
+    Returns:
+        Template string
+
+    Raises:
+        FileNotFoundError: If prompt file doesn't exist
+    """
+    template = _PROMPT_REGISTRY.get(prompt_name)
+    if template is None:
+        raise FileNotFoundError(f"Prompt template not found: {_PROMPTS_DIR / f'{prompt_name}.yaml'}")
+    return template
+
+
 def load_agent_config(agent_name: str) -> Dict[str, Any]:
     """
     Load agent configuration from Markdown file.
 
+    Cached per file path and modification time; treat the result as read-only.
+
     Args:
         agent_name: Name of the agent (without .md extension)
 
@@ -73,13 +128,17 @@ def load_agent_config(agent_name: str) -> Dict[str, Any]:
     Raises:
         FileNotFoundError: If agent config file doesn't exist
     """
-    base_path = Path(__file__).parent.parent.parent / "configs" / "agents"
-    md_path = base_path / f"{agent_name}.md"
+    md_path = _AGENTS_DIR / f"{agent_name}.md"
 
     if not md_path.exists():
         raise FileNotFoundError(f"Agent config not found: {md_path}")
 
-    with open(md_path, 'r', encoding='utf-8') as f:
+    return _load_agent_config_cached(agent_name, str(md_path), md_path.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=128)
+def _load_agent_config_cached(agent_name: str, md_path_str: str, mtime_ns: int) -> Dict[str, Any]:
+    with open(md_path_str, 'r', encoding='utf-8', buffering=_READ_BUFFER_SIZE) as f:
         content = f.read()
 
     # Initialize config
@@ -91,34 +150,21 @@ def load_agent_config(agent_name: str) -> Dict[str, Any]:
         "full_content": content
     }
 
-    # Simple markdown parsing
-    sections = content.split("\n## ")
-
-    for section in sections:
-        lines = section.split("\n")
-        if not lines:
-            continue
-
-        section_title = lines[0].strip("# ").strip()
+    # Simple markdown parsing: split on level-2 headers, then pull bullets
+    parts = _SECTION_RE.split(content)
+    list_sections = {
+        "Capabilities": config["capabilities"],
+        "A2UI Components Used": config["components"],
+    }
 
+    # parts[0] is the text before the first "## " header
+    for section_title, body in zip(parts[1::2], parts[2::2]):
         if section_title == "Purpose":
             # Get description from lines after title
-            desc_lines = [line.strip() for line in lines[1:] if line.strip() and not line.startswith("#")]
+            desc_lines = [line.strip() for line in body.splitlines() if line.strip() and not line.startswith("#")]
             config["description"] = " ".join(desc_lines)
-
-        elif section_title == "Capabilities":
-            # Extract bullet points
-            for line in lines[1:]:
-                line = line.strip()
-                if line.startswith("- ") or line.startswith("* "):
-                    config["capabilities"].append(line[2:].strip())
-
-        elif section_title == "A2UI Components Used":
-            # Extract bullet points
-            for line in lines[1:]:
-                line = line.strip()
-                if line.startswith("- ") or line.startswith("* "):
-                    config["components"].append(line[2:].strip())
+        elif section_title in list_sections:
+            list_sections[section_title].extend(_BULLET_RE.findall(body))
 
     return config
 
@@ -127,28 +173,53 @@ def load_component_catalog() -> Dict[str, Any]:
     """
     Load the A2UI component catalog from YAML.
 
+    Cached per file modification time; treat the result as read-only.
+
     Returns:
         Dictionary with component catalog definitions
 
     Raises:
         FileNotFoundError: If catalog file doesn't exist
     """
-    base_path = Path(__file__).parent.parent.parent / "configs" / "catalog"
-    catalog_path = base_path / "component_catalog.yaml"
+    catalog_path = _CATALOG_DIR / "component_catalog.yaml"
 
     if not catalog_path.exists():
         raise FileNotFoundError(f"Component catalog not found: {catalog_path}")
 
-    with open(catalog_path, 'r', encoding='utf-8') as f:
-        catalog = yaml.safe_load(f)
+    return _load_component_catalog_cached(str(catalog_path), catalog_path.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=128)
+def _load_component_catalog_cached(catalog_path_str: str, mtime_ns: int) -> Dict[str, Any]:
+    with open(catalog_path_str, 'rb', buffering=_READ_BUFFER_SIZE) as f:
+        catalog = yaml.load(f.read(), Loader=_SafeLoader)
 
     return catalog
 
 
+def clear_prompt_caches() -> None:
+    """Drop cached agent configs and catalogs and re-read all prompt templates"""
+    reload_prompts()
+    _load_agent_config_cached.cache_clear()
+    _load_component_catalog_cached.cache_clear()
+
+
+_formatter = string.Formatter()
+
+
+@lru_cache(maxsize=256)
+def _compile_template(template: str) -> tuple:
+    """Parse a format template once into (literal, field, spec, conversion) tuples"""
+    return tuple(_formatter.parse(template))
+
+
 def format_prompt_with_context(template: str, **kwargs) -> str:
     """
     Format a prompt template with context variables.
 
+    Equivalent to ``template.format(**kwargs)``, but the template is parsed
+    once and reused across calls.
+
     Args:
         template: Template string (may contain {variable} placeholders)
         **kwargs: Context variables to substitute
@@ -156,7 +227,17 @@ def format_prompt_with_context(template: str, **kwargs) -> str:
     Returns:
         Formatted prompt string
     """
+    parts = []
     try:
-        return template.format(**kwargs)
+        for literal, field_name, format_spec, conversion in _compile_template(template):
+            parts.append(literal)
+            if field_name is None:
+                continue
+            value, _ = _formatter.get_field(field_name, (), kwargs)
+            value = _formatter.convert_field(value, conversion)
+            if format_spec and "{" in format_spec:
+                format_spec = _formatter.vformat(format_spec, (), kwargs)
+            parts.append(format(value, format_spec))
     except KeyError as e:
         raise ValueError(f"Missing required context variable: {e}")
+    return "".join(parts)
@@ -0,0 +1,145 @@
+"""
+Semantic Prompt Cache
+
+In-process similarity cache placed in front of the LLM call. Requests are
+normalized and embedded; a stored response is returned when a new request
+is close enough to a previous one within the same namespace.
+"""
+
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\w+")
+
+Vector = Dict[str, float]
+
+
+def normalize_text(text: str) -> str:
+    """Casefold and collapse punctuation/whitespace so trivially different prompts match."""
+    return " ".join(_TOKEN_RE.findall(text.casefold()))
+
+
+def bag_of_words_embedding(text: str) -> Vector:
+    """
+    Default embedding: L2-normalized term-frequency vector over normalized tokens.
+
+    Lexical, not semantic: it ignores word order, so prompts that swap or
+    change a few words can still score above the threshold. Pass a
+    model-backed ``embed`` callable to SemanticCache for semantic matching.
+    """
+    counts = Counter(normalize_text(text).split())
+    norm = math.sqrt(sum(c * c for c in counts.values())) or 1.0
+    return {token: c / norm for token, c in counts.items()}
+
+
+def _cosine(a: Vector, b: Vector) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(token, 0.0) for token, weight in a.items())
+
+
+class SemanticCache:
+    """
+    Similarity cache with TTL expiry and LRU eviction.
+
+    Usage:
+        cache = SemanticCache(threshold=0.92, ttl_seconds=3600, max_entries=256)
+        hit = cache.lookup("build me a sales dashboard", namespace="dashboard_agent")
+        if hit is None:
+            cache.put("build me a sales dashboard", {"jsonl": ...}, namespace="dashboard_agent")
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 256,
+        embed: Callable[[str], Vector] = bag_of_words_embedding,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._embed = embed
+        # (namespace, normalized text) -> (expires_at, vector, value), oldest first
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Vector, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(
+        self,
+        text: str,
+        namespace: str = "",
+        threshold: Optional[float] = None,
+    ) -> Optional[Any]:
+        """
+        Return the cached value for the most similar prompt, or None on a miss.
+
+        Args:
+            text: Raw user prompt
+            namespace: Partition key (e.g. agent name + prompt template)
+            threshold: Minimum cosine similarity; defaults to the cache threshold
+        """
+        if self.max_entries <= 0:
+            return None
+        threshold = self.threshold if threshold is None else threshold
+        key = (namespace, normalize_text(text))
+        if not key[1]:
+            # Nothing left to compare (e.g. only punctuation)
+            return None
+        now = time.monotonic()
+
+        with self._lock:
+            self._evict_expired(now)
+
+            # Exact match after normalization skips the similarity scan
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[2]
+
+            query = self._embed(text)
+            best_key, best_score = None, threshold
+            for entry_key, (_, vector, _) in self._entries.items():
+                if entry_key[0] != namespace:
+                    continue
+                score = _cosine(query, vector)
+                if score >= best_score:
+                    best_key, best_score = entry_key, score
+
+            if best_key is None:
+                return None
+            self._entries.move_to_end(best_key)
+            return self._entries[best_key][2]
+
+    def put(self, text: str, value: Any, namespace: str = "") -> None:
+        """Store a value for a prompt, evicting the least recently used entry when full."""
+        if self.max_entries <= 0:
+            return
+        key = (namespace, normalize_text(text))
+        if not key[1]:
+            return
+        vector = self._embed(text)
+        now = time.monotonic()
+
+        with self._lock:
+            self._entries[key] = (now + self.ttl_seconds, vector, value)
+            self._entries.move_to_end(key)
+            self._evict_expired(now)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict_expired(self, now: float) -> None:
+        expired = [key for key, (expires_at, _, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
@@ -0,0 +1,64 @@
+"""
+A2UIBuilder serialization tests.
+"""
+
+from enum import IntEnum
+
+import pytest
+
+from app.schemas.a2ui_models import A2UIGenerationOutput, DataModelUpdate
+from app.utils.a2ui_builder import A2UIBuilder
+from app.utils.json_codec import loads
+
+STRUCTURED_OUTPUT = A2UIGenerationOutput.model_validate({
+    "messages": [
+        {"surfaceUpdate": {"surfaceId": "main", "components": [
+            {"id": "title", "component": {"Text": {"text": {"literalString": "Umsätze"}, "usage_hint": "title"}}},
+        ]}},
+        {"dataModelUpdate": {"surfaceId": "main", "path": "/sales", "contents": [
+            {"key": "data", "valueArray": [{"month": "Jan", "value": 100}]},
+        ]}},
+        {"beginRendering": {"surfaceId": "main"}},
+    ],
+    "reasoning": "test",
+})
+
+
+def test_from_structured_output_bytes_matches_str_variant():
+    jsonl_bytes = A2UIBuilder.from_structured_output_bytes(STRUCTURED_OUTPUT)
+
+    assert isinstance(jsonl_bytes, bytes)
+    assert jsonl_bytes == A2UIBuilder.from_structured_output(STRUCTURED_OUTPUT).encode("utf-8")
+    assert not jsonl_bytes.endswith(b"\n")
+    assert [next(iter(loads(line))) for line in jsonl_bytes.split(b"\n")] == [
+        "surfaceUpdate", "dataModelUpdate", "beginRendering",
+    ]
+
+
+def test_add_data_and_schema_map_values_alike():
+    class Level(IntEnum):
+        HIGH = 3
+
+    data = {"name": "Widget", "active": True, "count": 2, "level": Level.HIGH, "rows": [1]}
+    builder_contents = A2UIBuilder().add_data("/stats", data).data_updates[0]["contents"]
+    schema_contents = DataModelUpdate(surfaceId="main", path="/stats", contents=data).contents
+
+    assert builder_contents == [item.model_dump(exclude_none=True) for item in schema_contents]
+    assert builder_contents[1] == {"key": "active", "valueBoolean": True}
+    assert builder_contents[3] == {"key": "level", "valueNumber": 3.0}
+
+
+def test_add_component_keeps_none_props_on_the_wire():
+    builder = A2UIBuilder().add_component("name", "TextField", label={"literalString": "Name"}, placeholder=None)
+    surface_update = loads(builder.build_jsonl().split("\n")[0])["surfaceUpdate"]
+
+    assert surface_update["components"][0]["component"]["TextField"]["placeholder"] is None
+
+
+def test_components_is_a_read_only_view_of_the_output():
+    builder = A2UIBuilder().add_text("title", "Sales").add_row("row", ["title"])
+    surface_update = loads(builder.build_jsonl().split("\n")[0])["surfaceUpdate"]
+
+    assert builder.components == surface_update["components"]
+    with pytest.raises(AttributeError):
+        builder.components = []
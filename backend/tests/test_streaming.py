@@ -0,0 +1,83 @@
+"""
+Streaming endpoint tests.
+
+Agents run against a fake chat model whose JSON is cut off after the first
+A2UI message: that message is streamed as soon as the LLM closes it, then
+the final parse fails and the agent falls back to its error UI.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from app import main
+from app.agents import base_agent
+from app.agui_endpoint import agui_stream_endpoint
+from app.utils.json_codec import loads
+
+SURFACE_UPDATE = (
+    '{"surfaceUpdate": {"surfaceId": "main", "components": ['
+    '{"id": "title", "component": {"Text": {"text": {"literalString": "Sales"}, "usage_hint": "title"}}}'
+    ']}}'
+)
+TRUNCATED_OUTPUT = (
+    '{"messages": [' + SURFACE_UPDATE + ', '
+    '{"dataModelUpdate": {"surfaceId": "main", "path": "/sales", "contents": [{"key": "data", "valueArr'
+)
+
+
+@pytest.fixture
+def truncated_agent(monkeypatch):
+    """An agent graph whose LLM stops mid-way through its JSON response"""
+    def fake_llm(model_name, temperature, provider=None):
+        llm = GenericFakeChatModel(messages=iter([AIMessage(content=TRUNCATED_OUTPUT)]))
+        return llm, False
+
+    monkeypatch.setattr(base_agent, "_create_llm", fake_llm)
+    return base_agent.create_a2ui_agent(
+        agent_name="dashboard_agent",
+        prompt_template_name="dashboard_generation",
+    )
+
+
+async def _body(response) -> bytes:
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+def test_generate_truncated_output_ends_with_error_meta(truncated_agent, monkeypatch):
+    agents = (truncated_agent, truncated_agent, truncated_agent)
+    monkeypatch.setitem(main._agent_tuples, main.DEFAULT_PROVIDER, agents)
+
+    response = asyncio.run(main.generate_ui({"message": "Show me a sales dashboard"}))
+    lines = [loads(line) for line in asyncio.run(_body(response)).splitlines()]
+
+    # The partial surface is followed only by the error meta: no error UI,
+    # no test dashboard spliced onto it
+    assert lines[0]["surfaceUpdate"]["components"][0]["id"] == "title"
+    assert len(lines) == 2
+    meta = lines[-1]["meta"]
+    assert meta["success"] is False
+    assert meta["error"]
+
+
+def test_agui_stream_truncated_output_ends_with_error_event(truncated_agent):
+    graphs = {"dashboard_agent": truncated_agent}
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(graphs={"test": graphs})))
+    body = {"message": "Show me a sales dashboard", "agent": "dashboard_agent"}
+
+    response = asyncio.run(agui_stream_endpoint(request, "test", body))
+    frames = [
+        loads(frame[len(b"data: "):])
+        for frame in asyncio.run(_body(response)).split(b"\n\n")
+        if frame
+    ]
+    a2ui = [frame["data"] for frame in frames if frame["type"] == "a2ui"]
+
+    # Only the message streamed before the cut-off; the stream then closes
+    # with an error instead of replaying the error surface or completing
+    assert len(a2ui) == 1 and "surfaceUpdate" in loads(a2ui[0])
+    assert frames[-1]["type"] == "error"
+    assert not any(frame["type"] == "complete" for frame in frames)